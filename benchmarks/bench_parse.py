@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Parser benchmark for the Daily Quote Bot
+Measures parse time, peak memory and blocks retained after a parse for each
+HTML fixture, and end-to-end run() latency with the network stubbed out.
+Prints JSON results and can fail on regressions against a previous results
+file.
+
+The fixtures are synthetic: hand-written pages that mimic the greatday.com
+layout (normal page, large trailing scripts, malformed markup, fallback-only
+and unparseable pages). They are not recorded snapshots, so results say
+nothing about how the parsers handle the live site's exact markup.
+
+Usage:
+    python benchmarks/bench_parse.py [--repeat N] [--output results.json]
+                                     [--compare baseline.json --threshold 1.25]
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import daily_quote_bot  # noqa: E402
+
+# Synthetic, hand-written pages (see the module docstring)
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+class FakeResponse:
+    """Minimal stand-in for requests.Response"""
+
+    def __init__(self, body=b'', payload=None, status_code=200):
+        self.status_code = status_code
+        self.content = body
+        self.headers = {}
+        self.payload = payload
+        self.text = body.decode('utf-8', errors='replace')
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise daily_quote_bot.requests.exceptions.HTTPError(f"{self.status_code} Error", response=self)
+
+    def iter_content(self, chunk_size=1):
+        for offset in range(0, len(self.content), chunk_size):
+            yield self.content[offset:offset + chunk_size]
+
+    def json(self):
+        return self.payload
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    """Session stub serving a fixture page and accepting every Telegram send"""
+
+    def __init__(self, body):
+        self.body = body
+
+    def get(self, url, **kwargs):
+        return FakeResponse(body=self.body)
+
+    def post(self, url, **kwargs):
+        return FakeResponse(payload={'ok': True, 'result': {}})
+
+    def close(self):
+        pass
+
+
+def parse_once(html, engine):
+    """Run text extraction and line parsing exactly like fetch_daily_quote"""
+    lines = daily_quote_bot.PARSER_ENGINES[engine](html)
+    return daily_quote_bot.parse_quote_lines(lines)
+
+
+def measure_parse(html, engine, repeat):
+    """Time repeated parses, then measure memory for a single traced parse
+
+    An untimed warm-up parse runs first, so lazy imports (bs4) and regex
+    compilation don't land in the first timing. retained_blocks counts the
+    traced memory blocks still alive after a parse while its result is held,
+    not the number of allocations made during it.
+    """
+    parse_once(html, engine)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parsed = parse_once(html, engine)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    result = parse_once(html, engine)
+    snapshot = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    retained_blocks = sum(stat.count for stat in snapshot.statistics('filename'))
+    del result
+
+    return {
+        'min_ms': min(timings) * 1000,
+        'median_ms': statistics.median(timings) * 1000,
+        'mean_ms': statistics.mean(timings) * 1000,
+        'peak_bytes': peak,
+        'retained_blocks': retained_blocks,
+        'fallback': parsed is None or parsed['fallback']
+    }
+
+
+def measure_run(html, engine, repeat):
+    """Time bot.run() end to end with stubbed sessions and a throwaway state file
+
+    The first run is an untimed warm-up.
+    """
+    timings = []
+    with tempfile.TemporaryDirectory() as tmp:
+        bot = daily_quote_bot.DailyQuoteBot('0:benchmark', ['1'], parser=engine)
+        bot.quote_tracking_file = os.path.join(tmp, 'last_quote_data.json')
+        session = FakeSession(html)
+        bot.get_session = lambda url: session
+        for iteration in range(repeat + 1):
+            if os.path.exists(bot.quote_tracking_file):
+                os.remove(bot.quote_tracking_file)
+            start = time.perf_counter()
+            bot.run()
+            if iteration:
+                timings.append(time.perf_counter() - start)
+        bot.close()
+
+    return {
+        'min_ms': min(timings) * 1000,
+        'median_ms': statistics.median(timings) * 1000,
+        'mean_ms': statistics.mean(timings) * 1000
+    }
+
+
+def run_benchmarks(repeat):
+    """Benchmark every fixture with every parser engine"""
+    results = {
+        'python': sys.version.split()[0],
+        'repeat': repeat,
+        'fixtures': {}
+    }
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, '*.html'))):
+        with open(path, 'rb') as f:
+            html = f.read()
+        name = os.path.basename(path)
+        fixture_results = {'bytes': len(html), 'engines': {}}
+        for engine in daily_quote_bot.PARSER_ENGINES:
+            fixture_results['engines'][engine] = {
+                'parse': measure_parse(html, engine, repeat),
+                'run': measure_run(html, engine, max(1, repeat // 10))
+            }
+        results['fixtures'][name] = fixture_results
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return a list of regressions where median parse time grew past threshold"""
+    regressions = []
+    for name, fixture in results['fixtures'].items():
+        base_fixture = baseline.get('fixtures', {}).get(name)
+        if not base_fixture:
+            continue
+        for engine, stats in fixture['engines'].items():
+            base_stats = base_fixture['engines'].get(engine)
+            if not base_stats:
+                continue
+            for stage in ('parse', 'run'):
+                current = stats[stage]['median_ms']
+                previous = base_stats[stage]['median_ms']
+                if previous and current > previous * threshold:
+                    regressions.append(f"{name} [{engine}] {stage}: {previous:.3f}ms -> {current:.3f}ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the quote parsing path")
+    parser.add_argument('--repeat', type=int, default=50, help="timed iterations per fixture and engine")
+    parser.add_argument('--output', help="write JSON results to this file instead of stdout")
+    parser.add_argument('--compare', help="baseline JSON results to check for regressions")
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help="allowed slowdown factor against the baseline (default 1.25)")
+    args = parser.parse_args()
+
+    # Keep the bot's per-run logging out of the timings and the output
+    logging.disable(logging.WARNING)
+
+    results = run_benchmarks(max(1, args.repeat))
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
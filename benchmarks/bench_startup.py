@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Start-up benchmark for the Daily Quote Bot
+Imports the bot in fresh interpreters under -X importtime and reports the
+cumulative import time, the slowest modules and which heavy dependencies got
+loaded eagerly. Prints JSON results and can fail on regressions against a
+previous results file.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat N] [--top N] [--output results.json]
+                                       [--compare baseline.json --threshold 1.25]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dependencies that should only load once a run actually needs them
+HEAVY_MODULES = ('requests', 'bs4', 'urllib3')
+
+PROBE = (
+    "import sys, daily_quote_bot; "
+    f"print(','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))"
+)
+
+
+def import_once():
+    """Import the bot in a fresh interpreter; return ({module: cumulative_us}, eager modules)"""
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', PROBE], cwd=ROOT_DIR,
+                               capture_output=True, text=True, check=True)
+    timings = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        timings[name.strip()] = int(cumulative)
+    eager = [name for name in completed.stdout.strip().split(',') if name]
+    return timings, eager
+
+
+def run_benchmarks(repeat, top):
+    """Import the bot repeat times and summarise the import cost"""
+    totals = []
+    slowest = {}
+    eager = []
+    for _ in range(repeat):
+        timings, eager = import_once()
+        totals.append(timings.get('daily_quote_bot', 0) / 1000)
+        for name, cumulative in timings.items():
+            slowest.setdefault(name, []).append(cumulative / 1000)
+
+    top_modules = sorted(slowest.items(), key=lambda item: statistics.median(item[1]), reverse=True)[:top]
+    return {
+        'python': sys.version.split()[0],
+        'repeat': repeat,
+        'import': {
+            'min_ms': min(totals),
+            'median_ms': statistics.median(totals),
+            'mean_ms': statistics.mean(totals)
+        },
+        'eager_heavy_modules': eager,
+        'slowest_modules': {name: statistics.median(samples) for name, samples in top_modules}
+    }
+
+
+def compare(results, baseline, threshold):
+    """Return a list of regressions in import time or eagerly loaded modules"""
+    regressions = []
+    current = results['import']['median_ms']
+    previous = baseline.get('import', {}).get('median_ms')
+    if previous and current > previous * threshold:
+        regressions.append(f"import daily_quote_bot: {previous:.3f}ms -> {current:.3f}ms")
+    for name in results['eager_heavy_modules']:
+        if name not in baseline.get('eager_heavy_modules', []):
+            regressions.append(f"{name} is now imported at start-up")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the bot's start-up import cost")
+    parser.add_argument('--repeat', type=int, default=10, help="fresh interpreters to time")
+    parser.add_argument('--top', type=int, default=15, help="number of slowest modules to report")
+    parser.add_argument('--output', help="write JSON results to this file instead of stdout")
+    parser.add_argument('--compare', help="baseline JSON results to check for regressions")
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help="allowed slowdown factor against the baseline (default 1.25)")
+    args = parser.parse_args()
+
+    results = run_benchmarks(max(1, args.repeat), args.top)
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
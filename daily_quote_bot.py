@@ -5,15 +5,60 @@ Fetches daily quotes from greatday.com and sends to Telegram
 Only sends when there's a new quote available
 """
 
-import requests
-from bs4 import BeautifulSoup
 import os
-from datetime import datetime, date
+from datetime import datetime, date, timedelta, timezone
 import logging
+import signal
 import sys
+import functools
+import gzip
 import hashlib
+import html
 import json
+import mmap
+import struct
+import tempfile
+import sqlite3
+import re
+import random
 import time
+import threading
+import asyncio
+import codecs
+import importlib
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+from string import Template
+from collections import OrderedDict, deque, namedtuple
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, single-process use only
+    fcntl = None
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access
+
+    requests and bs4 make up most of the start-up time, yet a run that ends
+    on a 304 never parses HTML, so they are only loaded when first used.
+    """
+
+    def __init__(self, name):
+        self.__name = name
+        self.__module = None
+
+    def __getattr__(self, attr):
+        if self.__module is None:
+            self.__module = importlib.import_module(self.__name)
+        return getattr(self.__module, attr)
+
+
+requests = LazyModule('requests')
+requests_adapters = LazyModule('requests.adapters')
+bs4 = LazyModule('bs4')
 
 # Setup logging
 logging.basicConfig(
@@ -23,224 +68,2015 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Telegram allows roughly 30 messages per second per bot across all chats
+# and about one message per second to any single chat
+TELEGRAM_GLOBAL_RATE = 30
+TELEGRAM_CHAT_RATE = 1
+TELEGRAM_MAX_ATTEMPTS = 3
+TELEGRAM_MAX_THROTTLES = 5
+DEFAULT_MAX_WORKERS = 8
+
+QUOTE_SOURCE_URL = "https://www.greatday.com/"
+
+
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+TITLE_SKIP_WORDS = ['copyright', 'ralph marston', 'greatday', 'http', 'www']
+CONTENT_STOP_WORDS = [
+    'copyright', 'previous', 'permission', 'subscribe', 'email',
+    'greatday.com', 'make a plan', 'weekly focus', 'archives',
+    'home', 'contact', 'privacy', 'terms', 'navigate'
+]
+
+
+def compile_keyword_matcher(words, ignore_case=True):
+    """Compile a word list into one regex alternation (longest words first)"""
+    unique_words = sorted({word for word in words if word}, key=len, reverse=True)
+    pattern = '|'.join(re.escape(word) for word in unique_words) or r'(?!x)x'
+    return re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+
+
+def read_extra_keywords(name):
+    """Read a comma-separated keyword list from the environment"""
+    return [word.strip().lower() for word in os.environ.get(name, '').split(',') if word.strip()]
+
+
+def configure_keywords(title_skip_words=(), stop_words=()):
+    """Rebuild the precompiled matchers with extra title skip and content stop words"""
+    global TITLE_SKIP_MATCHER, CONTENT_STOP_MATCHER
+    TITLE_SKIP_MATCHER = compile_keyword_matcher(TITLE_SKIP_WORDS + list(title_skip_words))
+    CONTENT_STOP_MATCHER = compile_keyword_matcher(CONTENT_STOP_WORDS + list(stop_words))
+
+
+# Precompiled matchers used by the parsing hot loops. Operators can extend the
+# word lists with QUOTE_EXTRA_TITLE_SKIP_WORDS / QUOTE_EXTRA_STOP_WORDS.
+DAY_MATCHER = compile_keyword_matcher(DAY_NAMES, ignore_case=False)
+TERMINATOR_MATCHER = re.compile(r'^Ralph Marston|— Ralph|(?i:copyright)')
+configure_keywords(read_extra_keywords('QUOTE_EXTRA_TITLE_SKIP_WORDS'),
+                   read_extra_keywords('QUOTE_EXTRA_STOP_WORDS'))
+
+
+def parse_quote_lines(lines, fill_missing_date=True):
+    """Extract date, title, content paragraphs and author from page text lines
+
+    'fallback' in the result is True when the fallback method was needed.
+    A date missing from the page becomes today's date, or '' when
+    fill_missing_date is False (for re-extracting old pages). Returns None
+    when no content could be found even with the fallback.
+    """
+    date_str = ""
+    title = ""
+    content = []
+    author = "Ralph Marston"
+
+    # Find date and title with improved detection
+    for i, line in enumerate(lines):
+        # Look for day names in the line
+        if DAY_MATCHER.search(line):
+            date_str = line
+            # Look for title in next few lines
+            for j in range(i + 1, min(i + 4, len(lines))):
+                potential_title = lines[j]
+                # Title is usually short and not too long
+                if (len(potential_title) > 5 and
+                    len(potential_title) < 100 and
+                    not TITLE_SKIP_MATCHER.search(potential_title)):
+                    title = potential_title
+                    break
+            break
+
+    # Extract main content with improved filtering
+    content_started = False
+    title_found = False
+
+    for line in lines:
+        # Start collecting content after we find the title
+        if line == title and title and not title_found:
+            content_started = True
+            title_found = True
+            continue
+        elif content_started:
+            # Stop conditions
+            if (line.startswith('Ralph Marston') or
+                line == 'Ralph Marston' or
+                '— Ralph' in line):
+                if author == "Ralph Marston":
+                    author = line
+                break
+            elif CONTENT_STOP_MATCHER.search(line):
+                break
+            # Include valid content lines
+            elif (line and
+                  len(line) > 15 and
+                  not line.startswith('http') and
+                  not line.startswith('—') and
+                  '©' not in line and
+                  not line.isupper() and  # Skip navigation/header text
+                  len(line.split()) > 3):  # Ensure it's a proper sentence
+                content.append(line)
+
+    # Fallback parsing if main method didn't work
+    fallback = not date_str or not title or not content
+    if fallback:
+        logger.warning("Primary parsing failed, trying fallback method...")
+
+        # Try to find any meaningful content
+        all_text = ' '.join(lines)
+
+        # Look for patterns that might be the quote
+        paragraphs = [p.strip() for p in all_text.split('.') if len(p.strip()) > 50]
+
+        if paragraphs:
+            content = [paragraphs[0] + '.']  # Take first substantial paragraph
+
+        if not date_str and fill_missing_date:
+            date_str = datetime.now().strftime("%A, %B %d, %Y")
+        if not title:
+            title = "Daily Motivation"
+
+    if not content:
+        return None
+
+    return {
+        'date': date_str,
+        'title': title,
+        'content': content,
+        'author': author,
+        'fallback': fallback
+    }
+
+
+def extract_lines_soup(html):
+    """Build a full BeautifulSoup tree and return its non-empty text lines"""
+    soup = bs4.BeautifulSoup(html, 'html.parser')
+    return [line.strip() for line in soup.get_text().split('\n') if line.strip()]
+
+
+def is_quote_terminator(line):
+    """True for lines that end the quote block (signature or copyright)"""
+    return TERMINATOR_MATCHER.search(line) is not None
+
+
+class QuoteTextExtractor(HTMLParser):
+    """Streaming text extractor that stops once the quote block is complete
+
+    Produces the same lines as extract_lines_soup (script, style and template
+    contents are skipped, like get_text() does) and sets `complete` as soon as
+    a quote terminator shows up after the date line and the title window.
+    """
+
+    SKIPPED_TAGS = ('script', 'style', 'template')
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.lines = []
+        self.partial = ''
+        self.skip_depth = 0
+        self.date_index = None
+        self.complete = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIPPED_TAGS:
+            self.skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIPPED_TAGS and self.skip_depth:
+            self.skip_depth -= 1
+
+    def handle_data(self, data):
+        if self.skip_depth or self.complete:
+            return
+        pieces = (self.partial + data).split('\n')
+        self.partial = pieces.pop()
+        for piece in pieces:
+            self.add_line(piece)
+
+    def add_line(self, line):
+        line = line.strip()
+        if not line:
+            return
+        self.lines.append(line)
+        if self.date_index is None:
+            if DAY_MATCHER.search(line):
+                self.date_index = len(self.lines) - 1
+        elif len(self.lines) - 1 > self.date_index + 3 and is_quote_terminator(line):
+            self.complete = True
+
+    def finish(self):
+        """Flush buffered text and return the collected lines"""
+        self.close()
+        if not self.complete:
+            self.add_line(self.partial)
+        self.partial = ''
+        return self.lines
+
+
+def extract_lines_stream(html, chunk_size=8192):
+    """Feed the page in chunks and stop as soon as the quote block is complete"""
+    if isinstance(html, bytes):
+        html = html.decode('utf-8', errors='replace')
+    extractor = QuoteTextExtractor()
+    for offset in range(0, len(html), chunk_size):
+        extractor.feed(html[offset:offset + chunk_size])
+        if extractor.complete:
+            break
+    return extractor.finish()
+
+
+# Text extraction engines selectable with the QUOTE_PARSER setting
+PARSER_ENGINES = {
+    'soup': extract_lines_soup,
+    'stream': extract_lines_stream
+}
+DEFAULT_PARSER = 'soup'
+
+# Raw byte window holding the quote: from the first day name (the date line)
+# after the document head to the end of the line naming the author. The head
+# is skipped because its title and meta description can name both.
+BODY_TAG = re.compile(rb'</head\s*>|<body\b', re.IGNORECASE)
+BODY_WINDOW_START = re.compile(rb'\b(?:' + b'|'.join(day.encode() for day in DAY_NAMES) + rb')\b')
+BODY_WINDOW_END = b'Ralph Marston'
+
+
+def find_body_window(content):
+    """Return (start, end) of the raw quote window, or None if it isn't there
+
+    end is None while the author line has not been terminated yet.
+    """
+    body = BODY_TAG.search(content)
+    start = BODY_WINDOW_START.search(content, body.end() if body else 0)
+    if not start:
+        return None
+    author = content.find(BODY_WINDOW_END, start.end())
+    if author < 0:
+        return None
+    line_end = content.find(b'\n', author)
+    return start.start(), (line_end if line_end >= 0 else None)
+
+
+def body_fingerprint(content):
+    """BLAKE2 fingerprint of the quote region of a raw page, or None if not found
+
+    Only the window with the date, title, text and author is hashed, so
+    scripts, ads and footers that change on every request don't count.
+    """
+    window = find_body_window(content)
+    if window is None:
+        return None
+    start, end = window
+    return hashlib.blake2b(content[start:end], digest_size=16).hexdigest()
+
+
+def body_window_holds_quote(content, parsed):
+    """True if the raw quote window holds the parsed title and first paragraph
+
+    A fingerprint is only worth storing when this holds; otherwise the
+    window missed the quote and would hide the next day's change.
+    """
+    window = find_body_window(content)
+    if window is None or not parsed['content']:
+        return False
+    lines = extract_lines_stream(content[window[0]:window[1]])
+    return parsed['title'] in lines and parsed['content'][0] in lines
+
+
+# Streaming download limits
+DEFAULT_MAX_BODY_BYTES = 2 * 1024 * 1024
+DOWNLOAD_CHUNK_SIZE = 8192
+
+
+def read_quote_body(chunks, max_bytes=DEFAULT_MAX_BODY_BYTES, stop_early=True, deadline=None,
+                    extract_lines=False):
+    """Collect streamed body chunks until the raw quote window is complete
+
+    Reading stops once find_body_window sees the author line terminated (so
+    body_fingerprint hashes the same window as on the full page), or once
+    max_bytes have been read. The window is only searched again when a chunk
+    brings a new author name, so this stays cheap on every fetch. Trailing
+    scripts and footers are never downloaded unless stop_early is False.
+    With extract_lines, chunks are also fed to a QuoteTextExtractor so the
+    lines match extract_lines_stream(body) without a second parse, and
+    reading goes on until the extractor has seen the quote terminator too.
+    Raises a Timeout once the monotonic deadline passes between chunks.
+    Returns (body, lines or None, stopped_early).
+    """
+    body = bytearray()
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace') if extract_lines else None
+    extractor = QuoteTextExtractor() if extract_lines else None
+    window_seen = False
+    for chunk in chunks:
+        tail = max(0, len(body) - len(BODY_WINDOW_END))
+        body += chunk
+        if extractor and not extractor.complete:
+            extractor.feed(decoder.decode(chunk))
+        if stop_early and (window_seen or body.find(BODY_WINDOW_END, tail) >= 0):
+            window = find_body_window(body)
+            window_seen = window is not None
+            if window_seen and window[1] is not None and (extractor is None or extractor.complete):
+                return bytes(body), extractor.finish() if extractor else None, True
+        if len(body) >= max_bytes:
+            logger.warning(f"Stopped reading the page at the {max_bytes} byte limit")
+            break
+        if deadline is not None and time.monotonic() > deadline:
+            raise requests.exceptions.Timeout("Page body not read within the fetch budget")
+    if not extractor:
+        return bytes(body), None, False
+    if not extractor.complete:
+        extractor.feed(decoder.decode(b'', final=True))
+    return bytes(body), extractor.finish(), False
+
+
+# Near-duplicate detection: 64-bit SimHash over word shingles, indexed for
+# LSH lookups as 4 bands of 16 bits. Two fingerprints within Hamming
+# distance 3 always share at least one band (pigeonhole).
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 4
+SIMHASH_BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+DEFAULT_SIMHASH_DISTANCE = 3
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def quote_shingles(text, size=3):
+    """Split text into overlapping lowercase word n-grams"""
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) <= size:
+        return [' '.join(words)] if words else []
+    return [' '.join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+
+def simhash(text):
+    """Compute a 64-bit SimHash fingerprint that ignores whitespace and case"""
+    weights = [0] * SIMHASH_BITS
+    for shingle in quote_shingles(text):
+        value = int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), 'big')
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming_distance(a, b):
+    """Number of differing bits between two fingerprints"""
+    return bin(a ^ b).count('1')
+
+
+def simhash_bands(fingerprint):
+    """Split a fingerprint into its LSH band values"""
+    mask = (1 << SIMHASH_BAND_BITS) - 1
+    return [fingerprint >> (band * SIMHASH_BAND_BITS) & mask for band in range(SIMHASH_BANDS)]
+
+
+def to_signed64(value):
+    """Map an unsigned 64-bit value onto SQLite's signed INTEGER range"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def from_signed64(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+def parse_chat_ids(chat_ids):
+    """Normalize a chat id, a comma-separated string or a list into a list of ids"""
+    if isinstance(chat_ids, (list, tuple, set)):
+        items = chat_ids
+    else:
+        items = str(chat_ids).split(',')
+    result = []
+    for item in items:
+        item = str(item).strip()
+        if item and item not in result:
+            result.append(item)
+    return result
+
+
+def read_subscriber_lines(path):
+    """Yield the whitespace-separated fields of each subscriber line"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            fields = line.split('#', 1)[0].split()
+            if fields:
+                yield fields
+
+
+def load_chat_ids_file(path):
+    """Load subscriber chat ids from a file
+
+    One subscriber per line as "chat_id [format [locale]]", # for comments.
+    """
+    return [fields[0] for fields in read_subscriber_lines(path)]
+
+
+def load_chat_variants(path):
+    """Load per-chat (format, locale) overrides from a subscriber file"""
+    variants = {}
+    for fields in read_subscriber_lines(path):
+        if len(fields) > 1:
+            variants[fields[0]] = (fields[1].lower(), fields[2] if len(fields) > 2 else None)
+    return variants
+
+
+# Message rendering: one precompiled template per Telegram parse mode, with
+# the matching escaping applied to every field taken from the quote
+Message = namedtuple('Message', ['text', 'parse_mode'])
+
+MARKDOWN_V2_SPECIAL = re.compile(r'([_*\[\]()~`>#+\-=|{}.!\\])')
+
+
+def escape_markdown_v2(text):
+    """Escape Telegram MarkdownV2 special characters"""
+    return MARKDOWN_V2_SPECIAL.sub(r'\\\1', text)
+
+
+MESSAGE_FORMATS = {
+    'html': (Template("🌟 <b>$header</b>\n\n📅 <i>$date</i>\n\n<b>$title</b>\n\n$content\n\n— <i>$author</i>"),
+             lambda text: html.escape(text, quote=False), 'HTML'),
+    'markdownv2': (Template("🌟 *$header*\n\n📅 _${date}_\n\n*$title*\n\n$content\n\n— _${author}_"),
+                   escape_markdown_v2, 'MarkdownV2'),
+    'plain': (Template("🌟 $header\n\n📅 $date\n\n$title\n\n$content\n\n— $author"),
+              lambda text: text, None)
+}
+DEFAULT_MESSAGE_FORMAT = 'html'
+
+# Localized template labels; unknown locales fall back to DEFAULT_LOCALE
+MESSAGE_LABELS = {
+    'en': {'header': 'Daily Motivator'}
+}
+DEFAULT_LOCALE = 'en'
+RENDER_CACHE_SIZE = 64
+
+# Telegram's text limit, counted in UTF-16 code units. Markup is counted too,
+# which keeps every part safely below the limit after entity parsing.
+TELEGRAM_MESSAGE_LIMIT = 4096
+HTML_TAG_PATTERN = re.compile(r'<(/?)([a-zA-Z][a-zA-Z0-9-]*)[^>]*>')
+
+
+def telegram_length(text):
+    """Length of text in UTF-16 code units, as Telegram counts it"""
+    return len(text.encode('utf-16-le')) // 2
+
+
+def utf16_prefix_length(text, budget):
+    """Number of characters of text that fit into budget UTF-16 code units"""
+    used = 0
+    for index, char in enumerate(text):
+        used += 2 if ord(char) > 0xFFFF else 1
+        if used > budget:
+            return index
+    return len(text)
+
+
+def open_html_tags(text):
+    """Names of HTML tags left open at the end of text, outermost first"""
+    stack = []
+    for closing, name in HTML_TAG_PATTERN.findall(text):
+        name = name.lower()
+        if not closing:
+            stack.append(name)
+        elif name in stack:
+            del stack[len(stack) - 1 - stack[::-1].index(name)]
+    return stack
+
+
+def find_cut(text, parse_mode, budget):
+    """Pick a cut index within budget that never splits a tag, entity or escape"""
+    limit = utf16_prefix_length(text, budget)
+    cut = max(text.rfind('\n', 0, limit + 1), text.rfind(' ', 0, limit + 1))
+    if cut <= limit // 2:
+        cut = limit
+    if parse_mode == 'HTML':
+        tag_start = text.rfind('<', 0, cut)
+        if tag_start > text.rfind('>', 0, cut):
+            cut = tag_start
+        entity_start = text.rfind('&', 0, cut)
+        if entity_start > text.rfind(';', 0, cut) and cut - entity_start <= 10:
+            cut = entity_start
+    elif parse_mode == 'MarkdownV2':
+        while cut > 0 and (len(text[:cut]) - len(text[:cut].rstrip('\\'))) % 2:
+            cut -= 1
+    return cut if cut > 0 else max(limit, 1)
+
+
+def split_paragraph(paragraph, parse_mode, limit):
+    """Split one oversized paragraph, closing and reopening HTML tags at each cut"""
+    pieces = []
+    rest = paragraph
+    reserve = 64 if parse_mode == 'HTML' else 0
+    while telegram_length(rest) > limit:
+        cut = find_cut(rest, parse_mode, limit - reserve)
+        head, rest = rest[:cut].rstrip(), rest[cut:].lstrip()
+        if parse_mode == 'HTML':
+            tags = open_html_tags(head)
+            head += ''.join(f'</{tag}>' for tag in reversed(tags))
+            rest = ''.join(f'<{tag}>' for tag in tags) + rest
+        if head:
+            pieces.append(head)
+    if rest:
+        pieces.append(rest)
+    return pieces
+
+
+@functools.lru_cache(maxsize=RENDER_CACHE_SIZE)
+def split_message(text, parse_mode=None, limit=TELEGRAM_MESSAGE_LIMIT):
+    """Split text into ordered parts within Telegram's limit
+
+    Parts break between paragraphs where possible, then between lines or
+    words. HTML tags, entities and MarkdownV2 escapes are never cut, and
+    HTML tags still open at a cut are closed and reopened in the next part.
+    Returns a tuple of strings.
+    """
+    if telegram_length(text) <= limit:
+        return (text,)
+    parts = []
+    current = ''
+    for paragraph in text.split('\n\n'):
+        for index, piece in enumerate(split_paragraph(paragraph, parse_mode, limit)):
+            # Pieces cut from one paragraph never share a part, which would
+            # put a paragraph break where the text had none
+            candidate = f"{current}\n\n{piece}" if current else piece
+            if not index and telegram_length(candidate) <= limit:
+                current = candidate
+            else:
+                if current:
+                    parts.append(current)
+                current = piece
+    if current:
+        parts.append(current)
+    return tuple(parts)
+
+
+def message_parts(message):
+    """Split a rendered Message (or HTML text) into a list of Messages"""
+    if not isinstance(message, Message):
+        message = Message(message, 'HTML')
+    return [Message(text, message.parse_mode) for text in split_message(message.text, message.parse_mode)]
+
+
+class TokenBucket:
+    """Token bucket refilled at `rate` tokens per second, holding up to `capacity`
+
+    Used from a single event loop, so no locking is needed. block() pauses
+    the bucket entirely, e.g. for a Telegram retry_after.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def reserve(self):
+        """Take one token and return how many seconds to wait before using it"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        wait_time = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(wait_time, self.blocked_until - now)
+
+    def block(self, seconds):
+        """Hold back every reservation for the next `seconds`"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class DeliveryScheduler:
+    """Priority delivery queue that stays within Telegram's rate limits
+
+    Jobs are (priority, chat_id, message) tuples; lower priorities go first.
+    A message may be a list of parts, which are sent one after another so a
+    chat always receives them in order; a retry resumes at the failed part.
+    Every send waits for its chat's bucket (~1 msg/s) and then the global
+    bucket (~30 msg/s). A 429 pauses both buckets for the returned
+    retry_after before the job is re-queued. Network errors and 5xx answers
+    are retried with jittered backoff; other errors fail the job right away.
+    """
+
+    def __init__(self, send, workers=DEFAULT_MAX_WORKERS, global_rate=TELEGRAM_GLOBAL_RATE,
+                 chat_rate=TELEGRAM_CHAT_RATE, max_attempts=TELEGRAM_MAX_ATTEMPTS,
+                 max_throttles=TELEGRAM_MAX_THROTTLES):
+        self.send = send
+        self.workers = max(1, workers)
+        self.global_bucket = TokenBucket(global_rate)
+        self.chat_rate = chat_rate
+        self.chat_buckets = {}
+        self.max_attempts = max_attempts
+        self.max_throttles = max_throttles
+
+    def chat_bucket(self, chat_id):
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self.chat_buckets[chat_id] = TokenBucket(self.chat_rate)
+        return bucket
+
+    async def wait_for_slot(self, chat_id):
+        """Wait until both the chat and the global limits allow another send"""
+        delay = self.chat_bucket(chat_id).reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        delay = self.global_bucket.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def deliver(self, jobs, executor, on_result=None, on_progress=None):
+        """Deliver all jobs on the executor and return {chat_id: True/False}
+
+        on_result(chat_id, ok, retryable) is called as soon as each job
+        settles, where retryable tells a failure that gave up on throttling or
+        transient errors from a permanent one, and on_progress(chat_id,
+        parts_sent) after every delivered part.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.PriorityQueue()
+        for seq, (priority, chat_id, message) in enumerate(jobs):
+            parts = message if isinstance(message, list) else [message]
+            queue.put_nowait((priority, seq, chat_id, parts, 0, 1, 0))
+        results = {}
+        remaining = queue.qsize()
+        if not remaining:
+            return results
+        finished = asyncio.Event()
+
+        def finish(chat_id, ok, retryable=False):
+            nonlocal remaining
+            results[chat_id] = ok
+            try:
+                if on_result:
+                    on_result(chat_id, ok, retryable)
+            except Exception as e:
+                logger.error(f"Delivery result hook failed for chat {chat_id}: {e}")
+            finally:
+                remaining -= 1
+                if remaining == 0:
+                    finished.set()
+
+        def progress(chat_id, parts_sent):
+            try:
+                on_progress(chat_id, parts_sent)
+            except Exception as e:
+                logger.error(f"Delivery progress hook failed for chat {chat_id}: {e}")
+
+        async def worker():
+            while True:
+                priority, seq, chat_id, parts, part, attempt, throttles = await queue.get()
+                result = {'ok': True}
+                while part < len(parts):
+                    await self.wait_for_slot(chat_id)
+                    try:
+                        result = await loop.run_in_executor(executor, self.send, parts[part], chat_id)
+                    except Exception as e:
+                        result = {'ok': False, 'transient': True, 'description': str(e)}
+                    if not result['ok']:
+                        break
+                    part += 1
+                    attempt = 1
+                    if on_progress:
+                        progress(chat_id, part)
+
+                retry_after = result.get('retry_after')
+                if result['ok']:
+                    finish(chat_id, True)
+                elif retry_after is not None and throttles < self.max_throttles:
+                    logger.warning(f"⏳ Telegram rate limit hit for chat {chat_id} - retrying in {retry_after}s")
+                    self.global_bucket.block(retry_after)
+                    self.chat_bucket(chat_id).block(retry_after)
+                    queue.put_nowait((priority, seq, chat_id, parts, part, attempt, throttles + 1))
+                elif result.get('transient') and attempt < self.max_attempts:
+                    delay = random.uniform(0, min(8.0, 0.5 * 2 ** attempt))
+                    logger.warning(f"Send to chat {chat_id} failed (attempt {attempt}) - retrying in {delay:.1f}s")
+                    loop.call_later(delay, queue.put_nowait,
+                                    (priority, seq, chat_id, parts, part, attempt + 1, throttles))
+                else:
+                    finish(chat_id, False, retry_after is not None or bool(result.get('transient')))
+
+        tasks = [asyncio.ensure_future(worker()) for _ in range(min(self.workers, remaining))]
+        waiter = asyncio.ensure_future(finished.wait())
+        try:
+            # Workers only stop by raising, so surface that instead of waiting forever
+            done, _ = await asyncio.wait([waiter, *tasks], return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task is not waiter:
+                    task.result()
+        finally:
+            for task in (waiter, *tasks):
+                task.cancel()
+            await asyncio.gather(waiter, *tasks, return_exceptions=True)
+        return results
+
+
+def compute_quote_hash(quote_data):
+    """MD5 of a quote's date, title and first 200 characters of content"""
+    quote_identifier = f"{quote_data['date']}|{quote_data['title']}|{quote_data['content'][:200]}"
+    return hashlib.md5(quote_identifier.encode()).hexdigest()
+
+
+def get_quote_simhash(quote_data):
+    """SimHash of a quote's title and full content (the date is ignored)"""
+    return simhash(f"{quote_data['title']}\n{quote_data['content']}")
+
+
+def atomic_write(path, data):
+    """Replace path with data so readers see either the old or the new file
+
+    The bytes go to a temporary file in the same directory, are fsynced and
+    renamed over path; the directory is fsynced too so the rename survives a
+    crash.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        # Directories can't be opened on every platform (e.g. Windows)
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+@contextmanager
+def locked_file(path, exclusive=False):
+    """Hold a shared or exclusive flock on the sidecar lock file for path
+
+    Writers replace the file atomically under the exclusive lock, so readers
+    holding the shared lock see a stable file. A no-op where fcntl is missing.
+    Readers that can't create the lock file (e.g. in a read-only directory)
+    go ahead unlocked: the atomic replace still shows them a whole file.
+    """
+    if fcntl is None:
+        yield
+        return
+    try:
+        lock_file = open(f"{path}.lock", 'a')
+    except OSError as e:
+        if exclusive:
+            raise
+        logger.warning(f"Reading {path} without a lock: {e}")
+        yield
+        return
+    with lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+@contextmanager
+def try_locked_file(path):
+    """Try to take an exclusive flock on path without blocking
+
+    Yields True when the lock was acquired and False when another process
+    (or another bot in this one) holds it. The kernel drops the lock when
+    its holder exits, so a crashed run never leaves a stale lock behind.
+    Always acquired where fcntl is missing.
+    """
+    if fcntl is None:
+        yield True
+        return
+    with open(path, 'a') as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def file_stamp(path):
+    """(mtime_ns, inode, size) of path, which changes whenever the file is replaced"""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_ino, stat.st_size
+
+
+# Compact binary state: magic, format version, then (field id, length, value) records
+STATE_FORMATS = ('json', 'binary')
+DEFAULT_STATE_FORMAT = 'json'
+# Default state file per format; the GitHub workflow commits the JSON one
+STATE_FILES = {'json': 'last_quote_data.json', 'binary': 'last_quote_data.bin'}
+STATE_MAGIC = b'QBST'
+STATE_VERSION = 1
+STATE_HEADER = struct.Struct('<4sB')
+STATE_RECORD = struct.Struct('<BI')
+# Field ids are part of the file format: only ever append to this list
+STATE_FIELDS = ('hash', 'date', 'title', 'sent_at', 'fetch_date', 'content_preview',
+                'etag', 'last_modified', 'body_fingerprint', 'simhash')
+STATE_EXTRA_FIELD = 0
+
+
+def encode_state(data, state_format=DEFAULT_STATE_FORMAT):
+    """Serialise the quote state dict in the given format"""
+    if state_format == 'json':
+        return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+    if state_format != 'binary':
+        raise ValueError(f"Unknown state format: {state_format}")
+    records = [STATE_HEADER.pack(STATE_MAGIC, STATE_VERSION)]
+    extra = {}
+    for name, value in data.items():
+        if name in STATE_FIELDS and isinstance(value, str):
+            encoded = value.encode('utf-8')
+            records.append(STATE_RECORD.pack(STATE_FIELDS.index(name) + 1, len(encoded)) + encoded)
+        else:
+            extra[name] = value
+    if extra:
+        encoded = json.dumps(extra, ensure_ascii=False).encode('utf-8')
+        records.append(STATE_RECORD.pack(STATE_EXTRA_FIELD, len(encoded)) + encoded)
+    return b''.join(records)
+
+
+def decode_binary_state(buffer):
+    """Decode a binary state buffer (bytes or mmap); unknown field ids are skipped"""
+    if len(buffer) < STATE_HEADER.size:
+        raise ValueError("Truncated state header")
+    magic, version = STATE_HEADER.unpack_from(buffer, 0)
+    if magic != STATE_MAGIC:
+        raise ValueError("Not a binary state file")
+    if version != STATE_VERSION:
+        raise ValueError(f"Unsupported state format version: {version}")
+    data = {}
+    offset = STATE_HEADER.size
+    while offset < len(buffer):
+        if offset + STATE_RECORD.size > len(buffer):
+            raise ValueError("Truncated state record")
+        field, length = STATE_RECORD.unpack_from(buffer, offset)
+        offset += STATE_RECORD.size
+        if offset + length > len(buffer):
+            raise ValueError("Truncated state record")
+        value = buffer[offset:offset + length].decode('utf-8')
+        offset += length
+        if field == STATE_EXTRA_FIELD:
+            data.update(json.loads(value))
+        elif field <= len(STATE_FIELDS):
+            data[STATE_FIELDS[field - 1]] = value
+    return data
+
+
+def read_state_file(path):
+    """Load a state file in either format, telling them apart by the magic bytes
+
+    Binary files are memory-mapped, so only the records are copied out.
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(STATE_MAGIC)) != STATE_MAGIC:
+            f.seek(0)
+            return json.loads(f.read().decode('utf-8'))
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return decode_binary_state(buffer)
+
+
+class RunMetrics:
+    """Per-run stage timings and event counters, exported as Prometheus text
+
+    span(stage) times a block and adds it to the stage total, so stages hit
+    several times in a run (state I/O, sends) report their combined time.
+    Counters track events such as fallbacks, retries and skipped duplicates.
+    Everything is reset at the start of each run; the text output suits the
+    node_exporter textfile collector.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.durations = {}
+            self.observations = {}
+            self.counters = {}
+            self.result = None
+            self.finished_at = None
+
+    @contextmanager
+    def span(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            self.durations[stage] = self.durations.get(stage, 0.0) + seconds
+            self.observations[stage] = self.observations.get(stage, 0) + 1
+
+    def increment(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def finish(self, result):
+        with self.lock:
+            self.result = result
+            self.finished_at = time.time()
+
+    def summary(self):
+        """One-line stage timing summary for the log"""
+        with self.lock:
+            return ', '.join(f"{stage}={seconds * 1000:.1f}ms" for stage, seconds in self.durations.items())
+
+    def to_prometheus(self, prefix='quote_bot'):
+        """Render the last run as Prometheus text exposition format"""
+        with self.lock:
+            lines = [f"# HELP {prefix}_stage_seconds Time spent in each stage during the last run",
+                     f"# TYPE {prefix}_stage_seconds gauge"]
+            lines += [f'{prefix}_stage_seconds{{stage="{stage}"}} {seconds:.6f}'
+                      for stage, seconds in sorted(self.durations.items())]
+            lines += [f"# HELP {prefix}_stage_calls Number of times each stage ran during the last run",
+                      f"# TYPE {prefix}_stage_calls gauge"]
+            lines += [f'{prefix}_stage_calls{{stage="{stage}"}} {count}'
+                      for stage, count in sorted(self.observations.items())]
+            lines += [f"# HELP {prefix}_run_events Events counted during the last run",
+                      f"# TYPE {prefix}_run_events gauge"]
+            lines += [f'{prefix}_run_events{{event="{name}"}} {count}'
+                      for name, count in sorted(self.counters.items())]
+            if self.finished_at is not None:
+                lines += [f"# HELP {prefix}_last_run_timestamp_seconds When the last run finished",
+                          f"# TYPE {prefix}_last_run_timestamp_seconds gauge",
+                          f"{prefix}_last_run_timestamp_seconds {self.finished_at:.3f}",
+                          f"# HELP {prefix}_last_run_result Outcome of the last run",
+                          f"# TYPE {prefix}_last_run_result gauge",
+                          f'{prefix}_last_run_result{{result="{self.result}"}} 1']
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """Write the Prometheus text file atomically so scrapers never see half a file"""
+        atomic_write(path, self.to_prometheus().encode('utf-8'))
+
+
+# Source fetch policy defaults (seconds)
+DEFAULT_FETCH_BUDGET = 40
+DEFAULT_HEDGE_AFTER = 3.0
+DEFAULT_REQUEST_TIMEOUT = 30
+
+
+class FetchPolicy:
+    """Deadline-driven GET: one time budget, a hedged second request, jittered backoff
+
+    Every attempt gets at most what is left of the budget. If the first
+    request has not answered after hedge_after seconds, an identical second
+    request is raced against it and whichever succeeds first wins. Failed
+    attempts back off exponentially with full jitter, and the policy gives up
+    early once the remaining budget can't fit another attempt, so callers can
+    switch to a fallback instead of waiting out fixed timeouts.
+
+    With metrics set, the winning request's time to its response headers is
+    recorded as ttfb, along with retries and hedged requests. Callers that
+    pass stream=True race only on the headers and read the body themselves.
+    """
+
+    def __init__(self, budget=DEFAULT_FETCH_BUDGET, hedge_after=DEFAULT_HEDGE_AFTER, max_attempts=3,
+                 request_timeout=DEFAULT_REQUEST_TIMEOUT, backoff_base=0.5, backoff_cap=8.0,
+                 min_attempt_time=2.0, metrics=None):
+        self.budget = budget
+        self.hedge_after = hedge_after
+        self.max_attempts = max_attempts
+        self.request_timeout = request_timeout
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.min_attempt_time = min_attempt_time
+        self.metrics = metrics
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='quote-fetch')
+
+    def get(self, session, url, deadline=None, **kwargs):
+        """GET url within the budget; raises the last RequestException on failure
+
+        deadline (time.monotonic()) lets a caller that streams the body share
+        one budget with the request; it defaults to budget seconds from now.
+        """
+        deadline = deadline or time.monotonic() + self.budget
+        last_error = None
+        for attempt in range(self.max_attempts):
+            remaining = deadline - time.monotonic()
+            if remaining < self.min_attempt_time:
+                break
+            if attempt and self.metrics:
+                self.metrics.increment('fetch_retries')
+            try:
+                response = self._hedged_get(session, url, remaining, **kwargs)
+                response.raise_for_status()
+                return response
+            except requests.exceptions.RequestException as e:
+                last_error = e
+                logger.warning(f"Attempt {attempt + 1} failed: {e}")
+            if attempt == self.max_attempts - 1:
+                break
+            delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+            if time.monotonic() + delay + self.min_attempt_time > deadline:
+                break
+            time.sleep(delay)
+        logger.warning(f"Giving up on {url} within the {self.budget}s fetch budget")
+        raise last_error or requests.exceptions.Timeout(f"Fetch budget of {self.budget}s exhausted")
+
+    def _hedged_get(self, session, url, remaining, **kwargs):
+        deadline = time.monotonic() + remaining
+
+        def request():
+            timeout = min(max(deadline - time.monotonic(), 0.1), self.request_timeout)
+            start = time.perf_counter()
+            response = session.get(url, timeout=timeout, **kwargs)
+            timings[id(response)] = time.perf_counter() - start
+            return response
+
+        timings = {}
+        futures = [self.executor.submit(request)]
+        if self.hedge_after and self.hedge_after < remaining:
+            done, _ = wait(futures, timeout=self.hedge_after)
+            if not done:
+                logger.info(f"No response after {self.hedge_after}s - sending hedged request")
+                if self.metrics:
+                    self.metrics.increment('hedged_requests')
+                futures.append(self.executor.submit(request))
+
+        error = None
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=max(deadline - time.monotonic(), 0),
+                                 return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        other.add_done_callback(self._close_response)
+                    response = future.result()
+                    self._record_timing(response, timings.get(id(response)), kwargs.get('stream', False))
+                    return response
+                error = future.exception()
+        for other in pending:
+            other.add_done_callback(self._close_response)
+        raise error or requests.exceptions.Timeout(f"No response from {url} within {remaining:.1f}s")
+
+    def _record_timing(self, response, total, stream=False):
+        """Record time to first byte and, for buffered responses, the download
+
+        Streamed bodies are read and timed by the caller, so only ttfb counts.
+        """
+        if not self.metrics or total is None:
+            return
+        elapsed = getattr(response, 'elapsed', None)
+        ttfb = min(elapsed.total_seconds(), total) if elapsed is not None else total
+        self.metrics.observe('ttfb', ttfb)
+        if not stream and total > ttfb:
+            self.metrics.observe('download', total - ttfb)
+
+    @staticmethod
+    def _close_response(future):
+        """Release the connection held by a losing hedged request"""
+        if not future.cancelled() and future.exception() is None:
+            future.result().close()
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+
+# Default daemon schedule, matching the GitHub workflow (UTC)
+DEFAULT_CRON = '0 9,13,17,21 * * *'
+DEFAULT_POLL_MIN = 300
+DEFAULT_POLL_MAX = 3600
+
+
+class CronSchedule:
+    """Minimal 5-field cron expression (minute hour day-of-month month day-of-week)
+
+    Supports '*', lists, ranges and steps. Day-of-week uses 0-6 with 0 or 7
+    for Sunday. As in Vixie cron, when both day fields are restricted a time
+    matches if either of them does.
+    """
+
+    FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression!r}")
+        self.expression = expression
+        parsed = [self._parse_field(field, low, high)
+                  for field, (low, high) in zip(fields, self.FIELD_RANGES)]
+        self.minutes, self.hours, self.days, self.months, self.weekdays = parsed
+        if 7 in self.weekdays:
+            self.weekdays = (self.weekdays - {7}) | {0}
+        self.any_day = fields[2] == '*'
+        self.any_weekday = fields[4] == '*'
+
+    @staticmethod
+    def _parse_field(field, low, high):
+        values = set()
+        for part in field.split(','):
+            step = 1
+            if '/' in part:
+                part, step_str = part.split('/', 1)
+                step = int(step_str)
+                if step < 1:
+                    raise ValueError(f"Invalid cron step: {field!r}")
+            if part == '*':
+                start, end = low, high
+            elif '-' in part:
+                start, end = (int(value) for value in part.split('-', 1))
+            else:
+                start = end = int(part)
+                if step > 1:
+                    end = high
+            if start < low or end > high or start > end:
+                raise ValueError(f"Cron field {field!r} out of range {low}-{high}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment):
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.any_day:
+            return weekday_ok
+        if self.any_weekday:
+            return day_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, moment):
+        """Return the first matching minute strictly after moment"""
+        moment = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=366 * 5)
+        while moment < limit:
+            if moment.month not in self.months:
+                year = moment.year + (moment.month == 12)
+                moment = moment.replace(year=year, month=moment.month % 12 + 1, day=1, hour=0, minute=0)
+            elif not self._day_matches(moment):
+                moment = (moment + timedelta(days=1)).replace(hour=0, minute=0)
+            elif moment.hour not in self.hours:
+                moment = (moment + timedelta(hours=1)).replace(minute=0)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError(f"Cron expression never matches: {self.expression!r}")
+
+
+class QuoteArchive:
+    """Append-only SQLite archive of every quote sent
+
+    Hash, date, fetch date and title are indexed, so "have we ever sent
+    this?" is a single B-tree lookup and date ranges never load the whole
+    history into memory. SimHash bands are indexed too, for near-duplicate
+    candidate lookups.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS quotes (
+            id INTEGER PRIMARY KEY,
+            hash TEXT NOT NULL UNIQUE,
+            date TEXT NOT NULL,
+            title TEXT NOT NULL,
+            content TEXT NOT NULL,
+            author TEXT,
+            fetch_date TEXT NOT NULL,
+            sent_at TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_quotes_fetch_date ON quotes (fetch_date);
+        CREATE INDEX IF NOT EXISTS idx_quotes_date ON quotes (date);
+        CREATE INDEX IF NOT EXISTS idx_quotes_title ON quotes (title);
+    """
+
+    BAND_COLUMNS = tuple(f'band{band}' for band in range(SIMHASH_BANDS))
+
+    COLUMNS = ('hash', 'date', 'title', 'content', 'author', 'fetch_date', 'sent_at')
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(self.SCHEMA)
+        self._add_simhash_columns()
+        self.conn.commit()
+
+    def _add_simhash_columns(self):
+        """Add the SimHash columns and band indexes to older archives"""
+        existing = {row[1] for row in self.conn.execute('PRAGMA table_info(quotes)')}
+        for column in ('simhash',) + self.BAND_COLUMNS:
+            if column not in existing:
+                self.conn.execute(f'ALTER TABLE quotes ADD COLUMN {column} INTEGER')
+        for column in self.BAND_COLUMNS:
+            self.conn.execute(f'CREATE INDEX IF NOT EXISTS idx_quotes_{column} ON quotes ({column})')
+
+    def record(self, quote_data, quote_hash, sent_at=None, fingerprint=None):
+        """Append a sent quote; re-recording the same hash is a no-op"""
+        if fingerprint is None:
+            fingerprint = get_quote_simhash(quote_data)
+        with self.lock, self.conn:
+            self.conn.execute(
+                'INSERT OR IGNORE INTO quotes (hash, date, title, content, author, fetch_date, sent_at, '
+                f'simhash, {", ".join(self.BAND_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (quote_hash, quote_data['date'], quote_data['title'], quote_data['content'],
+                 quote_data.get('author', ''), quote_data['fetch_date'],
+                 sent_at or datetime.now().isoformat(), to_signed64(fingerprint),
+                 *simhash_bands(fingerprint)))
+
+    def find_near_duplicate(self, fingerprint, max_distance=DEFAULT_SIMHASH_DISTANCE):
+        """Return (hash, distance) of the closest archived quote within max_distance, or None
+
+        Candidates come from the band indexes, so only quotes sharing at least
+        one 16-bit band are compared. This finds every match for distances up
+        to SIMHASH_BANDS - 1.
+        """
+        bands = simhash_bands(fingerprint)
+        where = ' OR '.join(f'{column} = ?' for column in self.BAND_COLUMNS)
+        with self.lock:
+            rows = self.conn.execute(f'SELECT hash, simhash FROM quotes WHERE {where}', bands).fetchall()
+        best = None
+        for quote_hash, stored in rows:
+            distance = hamming_distance(fingerprint, from_signed64(stored))
+            if distance <= max_distance and (best is None or distance < best[1]):
+                best = (quote_hash, distance)
+        return best
+
+    def has_sent(self, quote_hash):
+        """Return True if a quote with this hash was ever sent"""
+        with self.lock:
+            row = self.conn.execute('SELECT 1 FROM quotes WHERE hash = ?', (quote_hash,)).fetchone()
+        return row is not None
+
+    def get(self, quote_hash):
+        """Return the archived quote with this hash, or None"""
+        return self._query_one('SELECT {} FROM quotes WHERE hash = ?', (quote_hash,))
+
+    def find_by_title(self, title):
+        """Return all archived quotes with exactly this title"""
+        return self._query('SELECT {} FROM quotes WHERE title = ? ORDER BY fetch_date', (title,))
+
+    def between(self, start_date, end_date):
+        """Return quotes fetched between two ISO dates (inclusive), oldest first"""
+        return self._query('SELECT {} FROM quotes WHERE fetch_date BETWEEN ? AND ? ORDER BY fetch_date',
+                           (str(start_date), str(end_date)))
+
+    def _query(self, sql, params):
+        with self.lock:
+            rows = self.conn.execute(sql.format(', '.join(self.COLUMNS)), params).fetchall()
+        return [dict(zip(self.COLUMNS, row)) for row in rows]
+
+    def _query_one(self, sql, params):
+        rows = self._query(sql + ' LIMIT 1', params)
+        return rows[0] if rows else None
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class Outbox:
+    """Durable per-chat delivery record for each quote, backed by SQLite (WAL)
+
+    Rows are written before fan-out and flipped to delivered as each send
+    completes, so a restarted run resumes with only the chats still
+    pending. Chats that failed with a retryable error are retried by the
+    next run; permanent rejections (e.g. 403 or 400) are not, unless no
+    chat has received the quote at all. Multipart
+    messages also record how many parts went out, so a resumed chat
+    continues at the next part. A crash can repeat at most the sends that
+    were in flight.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS outbox (
+            quote_hash TEXT NOT NULL,
+            chat_id TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            parts_sent INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (quote_hash, chat_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_outbox_status ON outbox (quote_hash, status);
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(self.SCHEMA)
+        columns = [row[1] for row in self.conn.execute('PRAGMA table_info(outbox)')]
+        if 'parts_sent' not in columns:
+            self.conn.execute('ALTER TABLE outbox ADD COLUMN parts_sent INTEGER NOT NULL DEFAULT 0')
+        self.conn.commit()
+
+    def enqueue(self, quote_hash, chat_ids):
+        """Record every chat as pending for this quote
+
+        Existing rows keep their progress, and chats that failed in an
+        earlier run are set back to pending so this run retries them.
+        Rejected chats are only retried while nobody has the quote yet.
+        """
+        now = datetime.now().isoformat()
+        with self.lock, self.conn:
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO outbox (quote_hash, chat_id, updated_at) VALUES (?, ?, ?)',
+                [(quote_hash, str(chat_id), now) for chat_id in chat_ids])
+            self.conn.execute(
+                "UPDATE outbox SET status = 'pending', updated_at = ? WHERE quote_hash = ? AND "
+                "(status = 'failed' OR (status = 'rejected' AND NOT EXISTS "
+                "(SELECT 1 FROM outbox WHERE quote_hash = ? AND status = 'delivered')))",
+                (now, quote_hash, quote_hash))
+
+    def pending(self, quote_hash):
+        """Return {chat_id: parts_sent} for the chats that still need this quote"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT chat_id, parts_sent FROM outbox WHERE quote_hash = ? AND status = 'pending' ORDER BY rowid",
+                (quote_hash,)).fetchall()
+        return dict(rows)
+
+    def mark_progress(self, quote_hash, chat_id, parts_sent):
+        """Record that the first parts_sent parts of a multipart message went out"""
+        with self.lock, self.conn:
+            self.conn.execute(
+                'UPDATE outbox SET parts_sent = ?, updated_at = ? WHERE quote_hash = ? AND chat_id = ?',
+                (parts_sent, datetime.now().isoformat(), quote_hash, str(chat_id)))
+
+    def mark(self, quote_hash, chat_id, delivered, retryable=True):
+        """Record the outcome of one chat's delivery"""
+        status = 'delivered' if delivered else 'failed' if retryable else 'rejected'
+        with self.lock, self.conn:
+            self.conn.execute(
+                'UPDATE outbox SET status = ?, attempts = attempts + 1, updated_at = ? '
+                'WHERE quote_hash = ? AND chat_id = ?',
+                (status, datetime.now().isoformat(), quote_hash, str(chat_id)))
+
+    def summary(self, quote_hash):
+        """Return {status: count} for this quote"""
+        with self.lock:
+            rows = self.conn.execute('SELECT status, COUNT(*) FROM outbox WHERE quote_hash = ? GROUP BY status',
+                                     (quote_hash,)).fetchall()
+        return dict(rows)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def read_page(path):
+    """Read a saved page, decompressing .zst and .gz files"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if path.endswith('.zst'):
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(data)
+    if path.endswith('.gz'):
+        return gzip.decompress(data)
+    return data
+
+
+class ResponseArchive:
+    """Content-addressed store of every fetched page, indexed by fetch time
+
+    Bodies are stored once per SHA-256 digest under objects/, compressed
+    with zstd when the zstandard package is installed and gzip otherwise.
+    Each fetch adds a row to a SQLite (WAL) index, so repeated identical
+    pages cost one index row and no extra blob. The directory can be fed
+    straight to the replay subcommand.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS fetches (
+            id INTEGER PRIMARY KEY,
+            fetched_at TEXT NOT NULL,
+            url TEXT NOT NULL,
+            status INTEGER NOT NULL,
+            digest TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            path TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_fetches_fetched_at ON fetches (fetched_at);
+        CREATE INDEX IF NOT EXISTS idx_fetches_digest ON fetches (digest);
+    """
+
+    INDEX_NAME = 'index.db'
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(os.path.join(directory, 'objects'), exist_ok=True)
+        try:
+            import zstandard
+            self.suffix = '.html.zst'
+            self.compress = zstandard.ZstdCompressor(level=10).compress
+        except ImportError:
+            self.suffix = '.html.gz'
+            self.compress = functools.partial(gzip.compress, compresslevel=9, mtime=0)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(directory, self.INDEX_NAME), check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(self.SCHEMA)
+        self.conn.commit()
+
+    @classmethod
+    def is_archive(cls, directory):
+        return os.path.isfile(os.path.join(directory, cls.INDEX_NAME))
+
+    def store(self, url, body, status=200, fetched_at=None):
+        """Archive one fetched body and return its digest"""
+        digest = hashlib.sha256(body).hexdigest()
+        with self.lock:
+            row = self.conn.execute('SELECT path FROM fetches WHERE digest = ? LIMIT 1', (digest,)).fetchone()
+            path = row[0] if row else os.path.join('objects', digest[:2], digest[2:] + self.suffix)
+            full_path = os.path.join(self.directory, path)
+            if not os.path.exists(full_path):
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                atomic_write(full_path, self.compress(body))
+            with self.conn:
+                self.conn.execute(
+                    'INSERT INTO fetches (fetched_at, url, status, digest, size, path) VALUES (?, ?, ?, ?, ?, ?)',
+                    (self._timestamp(fetched_at or datetime.now()), url, status, digest, len(body), path))
+        return digest
+
+    def load(self, digest):
+        """Return the archived body for a digest, or None"""
+        with self.lock:
+            row = self.conn.execute('SELECT path FROM fetches WHERE digest = ? LIMIT 1', (digest,)).fetchone()
+        return read_page(os.path.join(self.directory, row[0])) if row else None
+
+    @staticmethod
+    def _timestamp(moment):
+        """Normalise a datetime, date or ISO string to the naive local ISO form used for fetched_at
+
+        Like sent_at and updated_at elsewhere, fetch times are naive local
+        time; timezone-aware inputs are converted to local time first.
+        Strings that aren't full ISO dates (e.g. '2026') are kept as prefixes.
+        """
+        if isinstance(moment, str):
+            try:
+                moment = datetime.fromisoformat(moment)
+            except ValueError:
+                return moment
+        elif not isinstance(moment, datetime):
+            moment = datetime.combine(moment, datetime.min.time())
+        if moment.tzinfo is not None:
+            moment = moment.astimezone().replace(tzinfo=None)
+        return moment.isoformat()
+
+    def between(self, start, end):
+        """Fetches with start <= fetched_at < end, oldest first
+
+        start and end may be datetimes, dates or ISO strings, with or
+        without a timezone.
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT fetched_at, url, status, digest, size FROM fetches '
+                'WHERE fetched_at >= ? AND fetched_at < ? ORDER BY fetched_at',
+                (self._timestamp(start), self._timestamp(end))).fetchall()
+        return [dict(zip(('fetched_at', 'url', 'status', 'digest', 'size'), row)) for row in rows]
+
+    def pages(self):
+        """Yield (name, blob path) for each distinct page, by first fetch time"""
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT MIN(fetched_at), digest, path FROM fetches GROUP BY digest ORDER BY 1').fetchall()
+        for fetched_at, digest, path in rows:
+            yield f"{fetched_at} {digest}", os.path.join(self.directory, path)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class QuoteProvider:
+    """Base class for quote sources
+
+    fetch(bot) returns a quote dict, {'not_modified': True} when the source
+    reports nothing new, or None when the source failed or had no quote.
+    """
+
+    name = 'provider'
+
+    def fetch(self, bot):
+        raise NotImplementedError
+
+
+class GreatDayProvider(QuoteProvider):
+    """Ralph Marston's Daily Motivator from greatday.com"""
+
+    name = 'greatday'
+
+    def __init__(self, url=QUOTE_SOURCE_URL):
+        self.url = url
+
+    def fetch(self, bot):
+        """Fetch and parse today's quote from greatday.com"""
+        try:
+            url = self.url
+            
+            headers = {
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+                'Accept-Language': 'en-US,en;q=0.9',
+                'Accept-Encoding': 'gzip, deflate, br',
+                'Connection': 'keep-alive',
+                'Upgrade-Insecure-Requests': '1',
+                'Sec-Fetch-Dest': 'document',
+                'Sec-Fetch-Mode': 'navigate',
+                'Sec-Fetch-Site': 'none',
+                'Sec-Fetch-User': '?1',
+                'Cache-Control': 'no-cache'
+            }
+
+            # Conditional GET: let the server answer 304 if the page is unchanged
+            last_data = bot.load_last_quote_data() or {}
+            if last_data.get('etag'):
+                headers['If-None-Match'] = last_data['etag']
+            if last_data.get('last_modified'):
+                headers['If-Modified-Since'] = last_data['last_modified']
+
+            logger.info("Fetching quote from greatday.com...")
+            
+            # Deadline-bounded fetch with hedging and jittered retries
+            # Only the headers are awaited here; the body is streamed below
+            # under the same fetch budget
+            deadline = time.monotonic() + bot.fetch_policy.budget
+            with bot.metrics.span('fetch'):
+                response = bot.fetch_policy.get(bot.get_session(url), url, deadline=deadline, headers=headers,
+                                                allow_redirects=True, stream=True)
+
+            logger.info(f"Response status: {response.status_code}")
+
+            if response.status_code == 304:
+                response.close()
+                logger.info("Page not modified since last fetch - skipping parse")
+                bot.metrics.increment('not_modified')
+                return {'not_modified': True}
+
+            # Stop downloading once the quote block has arrived, unless the
+            # full page is wanted for the response archive
+            try:
+                with bot.metrics.span('download'):
+                    content, stream_lines, complete = read_quote_body(
+                        response.iter_content(DOWNLOAD_CHUNK_SIZE), bot.max_body_bytes,
+                        stop_early=bot.response_archive is None, deadline=deadline,
+                        extract_lines=bot.parser_engine == 'stream')
+            finally:
+                response.close()
+            bot.metrics.increment('body_bytes', len(content))
+            logger.info(f"Response size: {len(content)} bytes"
+                        f"{' (stopped after the quote block)' if complete else ''}")
+
+            if bot.response_archive:
+                try:
+                    with bot.metrics.span('state_io'):
+                        digest = bot.response_archive.store(url, content, response.status_code)
+                    logger.info(f"Page archived as {digest[:12]}...")
+                except Exception as e:
+                    logger.error(f"Could not archive page: {e}")
+
+            # Skip all parsing when the quote region matches the stored state
+            with bot.metrics.span('fingerprint'):
+                fingerprint = body_fingerprint(content)
+            if fingerprint and fingerprint == last_data.get('body_fingerprint'):
+                logger.info("Quote region of the page is unchanged - skipping parse")
+                bot.metrics.increment('fingerprint_hits')
+                return {'not_modified': True,
+                        'etag': response.headers.get('ETag', ''),
+                        'last_modified': response.headers.get('Last-Modified', ''),
+                        'body_fingerprint': fingerprint}
+
+            # The stream engine's lines were already extracted during the download
+            with bot.metrics.span('parse'):
+                if bot.parser_engine == 'stream':
+                    lines = stream_lines
+                else:
+                    lines = PARSER_ENGINES[bot.parser_engine](content)
+                parsed = parse_quote_lines(lines)
+            logger.info(f"Content preview: {chr(10).join(lines)[:200]}...")
+
+            if not parsed:
+                logger.warning("Could not extract content from greatday.com")
+                return None
+            if fingerprint and not body_window_holds_quote(content, parsed):
+                logger.warning("Quote window of the page does not hold the parsed quote - not fingerprinting it")
+                fingerprint = None
+
+            quote_data = {
+                'date': parsed['date'],
+                'title': parsed['title'],
+                'content': '\n\n'.join(parsed['content']),
+                'author': parsed['author'],
+                'fetch_date': str(date.today()),
+                'etag': response.headers.get('ETag', ''),
+                'last_modified': response.headers.get('Last-Modified', ''),
+                'body_fingerprint': fingerprint or ''
+            }
+
+            logger.info(f"Successfully parsed quote:")
+            logger.info(f"  Date: {quote_data['date']}")
+            logger.info(f"  Title: {quote_data['title']}")
+            logger.info(f"  Content length: {len(quote_data['content'])} chars")
+            logger.info(f"  Content paragraphs: {len(parsed['content'])}")
+            
+            return quote_data
+
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Network error fetching quote: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Error fetching quote: {e}")
+            import traceback
+            logger.error(f"Traceback: {traceback.format_exc()}")
+            return None
+
+
+class LocalCorpusProvider(QuoteProvider):
+    """Quotes from a local JSON file: a list of {title, content, author} objects
+
+    The quote is chosen by date, so every run on the same day picks the same
+    one and the duplicate check keeps it from being sent twice.
+    """
+
+    name = 'corpus'
+
+    def __init__(self, path):
+        self.path = path
+
+    def fetch(self, bot):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                quotes = [quote for quote in json.load(f) if quote.get('content')]
+        except Exception as e:
+            logger.error(f"Could not load quote corpus {self.path}: {e}")
+            return None
+        if not quotes:
+            return None
+
+        today = date.today()
+        selected_quote = quotes[today.toordinal() % len(quotes)]
+        return {
+            'date': today.strftime("%A, %B %d, %Y"),
+            'title': selected_quote.get('title', 'Daily Motivation'),
+            'content': selected_quote['content'],
+            'author': selected_quote.get('author', 'Daily Motivator'),
+            'fetch_date': str(today)
+        }
+
+
+# Registered quote sources; QUOTE_SOURCES lists them in rank order as
+# name or name:argument (e.g. "greatday,corpus:quotes.json")
+QUOTE_PROVIDERS = {
+    'greatday': GreatDayProvider,
+    'corpus': LocalCorpusProvider
+}
+DEFAULT_SOURCES = 'greatday'
+DEFAULT_SOURCE_DEADLINE = 45
+
+
+def register_provider(name, factory):
+    """Register a quote provider factory under a source name"""
+    QUOTE_PROVIDERS[name] = factory
+
+
+def create_providers(spec):
+    """Build providers from a comma-separated source spec, in rank order"""
+    providers = []
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, argument = item.partition(':')
+        if name not in QUOTE_PROVIDERS:
+            raise ValueError(f"Unknown quote source: {name}")
+        factory = QUOTE_PROVIDERS[name]
+        providers.append(factory(argument) if argument else factory())
+    return providers
+
+
 class DailyQuoteBot:
-    def __init__(self, telegram_token, chat_id):
-        """Initialize the bot with Telegram credentials"""
+    def __init__(self, telegram_token, chat_id, max_workers=DEFAULT_MAX_WORKERS, pool_size=None,
+                 parser=DEFAULT_PARSER, archive_path=None,
+                 near_duplicate_distance=DEFAULT_SIMHASH_DISTANCE, providers=None,
+                 source_deadline=DEFAULT_SOURCE_DEADLINE, fetch_policy=None, outbox_path=None,
+                 message_format=DEFAULT_MESSAGE_FORMAT, locale=DEFAULT_LOCALE, chat_variants=None,
+                 metrics_path=None, max_body_bytes=DEFAULT_MAX_BODY_BYTES,
+                 state_format=DEFAULT_STATE_FORMAT, response_archive_path=None, state_path=None):
+        """Initialize the bot with Telegram credentials
+
+        chat_id may be a single chat id, a comma-separated string or a list
+        of subscriber chat ids; the quote is fanned out to all of them.
+        pool_size sets the keep-alive connections kept per host (defaults
+        to max_workers, so every fan-out worker can reuse a connection).
+        parser selects the text extraction engine ('soup' or 'stream').
+        archive_path enables the SQLite history of every quote sent.
+        near_duplicate_distance is the SimHash Hamming distance at or below
+        which a quote counts as already sent (None disables the check).
+        providers lists the quote sources in rank order (default: greatday.com)
+        and source_deadline bounds how long a run waits for them.
+        fetch_policy controls the per-source HTTP budget and hedging.
+        outbox_path enables the durable per-chat outbox for resumable fan-out.
+        message_format ('html', 'markdownv2' or 'plain') and locale set the
+        default rendering; chat_variants maps chat ids to their own
+        (format, locale) pair.
+        metrics_path, if set, receives Prometheus text metrics after each run.
+        max_body_bytes caps how much of the source page is downloaded.
+        state_format ('json' or 'binary') is the format the state file is
+        written in; either format is read back. state_path defaults to
+        last_quote_data.json, or last_quote_data.bin for the binary format,
+        which falls back to the JSON file of the same name until its first
+        write.
+        response_archive_path enables the content-addressed archive of every
+        fetched page (full bodies, for parser debugging and replay).
+        """
+        if message_format not in MESSAGE_FORMATS:
+            raise ValueError(f"Unknown message format: {message_format}")
+        if parser not in PARSER_ENGINES:
+            raise ValueError(f"Unknown parser engine: {parser}")
+        if state_format not in STATE_FORMATS:
+            raise ValueError(f"Unknown state format: {state_format}")
+        state_path = state_path or STATE_FILES[state_format]
+        if state_format == 'binary' and state_path.endswith('.json'):
+            raise ValueError(f"Binary state can't be written to a .json file: {state_path}")
         self.telegram_token = telegram_token
-        self.chat_id = chat_id
+        self.chat_ids = parse_chat_ids(chat_id)
+        self.chat_id = self.chat_ids[0] if self.chat_ids else chat_id
+        self.max_workers = max_workers
+        self.parser_engine = parser
         self.base_url = f"https://api.telegram.org/bot{telegram_token}"
-        self.quote_tracking_file = 'last_quote_data.json'
+        self.quote_tracking_file = state_path
+        self.state_format = state_format
+        self.state_cache = None
+        self.state_lock = threading.Lock()
+        self.delivery = DeliveryScheduler(self.post_message, workers=max_workers)
+        self.pool_size = pool_size or max(max_workers, 1)
+        self.sessions = {}
+        self.sessions_lock = threading.Lock()
+        self.executor = None
+        self.archive = QuoteArchive(archive_path) if archive_path else None
+        self.outbox = Outbox(outbox_path) if outbox_path else None
+        self.response_archive = ResponseArchive(response_archive_path) if response_archive_path else None
+        self.message_format = message_format
+        self.locale = locale if locale in MESSAGE_LABELS else DEFAULT_LOCALE
+        self.chat_variants = {chat: ((fmt if fmt in MESSAGE_FORMATS else None), loc)
+                              for chat, (fmt, loc) in (chat_variants or {}).items()}
+        self.render_cache = OrderedDict()
+        self.near_duplicate_distance = near_duplicate_distance
+        self.providers = providers or [GreatDayProvider()]
+        self.source_deadline = source_deadline
+        self.fetch_policy = fetch_policy or FetchPolicy(budget=min(DEFAULT_FETCH_BUDGET, source_deadline))
+        self.metrics = RunMetrics()
+        self.metrics_path = metrics_path
+        self.max_body_bytes = max_body_bytes
+        if self.fetch_policy.metrics is None:
+            self.fetch_policy.metrics = self.metrics
+
+    def get_session(self, url):
+        """Return the pooled keep-alive session for the host of this url"""
+        host = urlsplit(url).netloc
+        with self.sessions_lock:
+            session = self.sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = requests_adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self.sessions[host] = session
+            return session
+
+    def get_executor(self):
+        """Return the worker pool used for blocking fetch, state and send calls"""
+        with self.sessions_lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=max(1, self.max_workers),
+                                                   thread_name_prefix='quote-bot')
+            return self.executor
+
+    def close(self):
+        """Close all pooled HTTP sessions, the worker pool, the archives and the outbox"""
+        with self.sessions_lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions.clear()
+            if self.executor is not None:
+                self.executor.shutdown(wait=True)
+                self.executor = None
+        self.fetch_policy.close()
+        if self.archive:
+            self.archive.close()
+        if self.outbox:
+            self.outbox.close()
+        if self.response_archive:
+            self.response_archive.close()
 
     def get_quote_hash(self, quote_data):
         """Generate a unique hash for the quote to detect changes"""
-        # Create hash based on date, title and first 200 chars of content
-        quote_identifier = f"{quote_data['date']}|{quote_data['title']}|{quote_data['content'][:200]}"
-        return hashlib.md5(quote_identifier.encode()).hexdigest()
+        with self.metrics.span('hash'):
+            return compute_quote_hash(quote_data)
 
     def load_last_quote_data(self):
-        """Load the last sent quote data"""
+        """Load the last sent quote data
+
+        The parsed state is cached in memory and only re-read when the file's
+        mtime, inode or size changes, i.e. when another process replaced it.
+        Callers get their own copy. A binary state file that doesn't exist
+        yet is read from the JSON file with the same name, so switching
+        formats doesn't lose the last sent quote.
+        """
         try:
-            if os.path.exists(self.quote_tracking_file):
-                with open(self.quote_tracking_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+            path = self.quote_tracking_file
+            if self.state_format == 'binary' and not os.path.exists(path):
+                path = os.path.splitext(path)[0] + '.json'
+            if os.path.exists(path):
+                with self.state_lock:
+                    cached = self.state_cache
+                    if cached and cached[0] == (path, *file_stamp(path)):
+                        return dict(cached[1])
+                    with self.metrics.span('state_io'), locked_file(path):
+                        stamp = (path, *file_stamp(path))
+                        data = read_state_file(path)
                     # Handle empty or malformed files
                     if not data or not isinstance(data, dict):
+                        self.state_cache = None
                         return None
-                    return data
+                    self.state_cache = (stamp, data)
+                    return dict(data)
             return None
         except Exception as e:
-            logger.warning(f"Could not load last quote data: {e}")
+            logger.error(f"Could not load last quote data: {e}")
             return None
 
+    def write_state(self, data):
+        """Atomically replace the state file with data and update the cache"""
+        with self.state_lock:
+            self.state_cache = None
+            with self.metrics.span('state_io'), locked_file(self.quote_tracking_file, exclusive=True):
+                atomic_write(self.quote_tracking_file, encode_state(data, self.state_format))
+                stamp = (self.quote_tracking_file, *file_stamp(self.quote_tracking_file))
+            self.state_cache = (stamp, dict(data))
+
     def save_quote_data(self, quote_data, quote_hash):
         """Save the current quote data and hash"""
+        sent_at = datetime.now().isoformat()
+        with self.metrics.span('hash'):
+            fingerprint = get_quote_simhash(quote_data)
+        if self.archive:
+            try:
+                with self.metrics.span('state_io'):
+                    self.archive.record(quote_data, quote_hash, sent_at, fingerprint)
+            except Exception as e:
+                logger.error(f"Could not archive quote: {e}")
         try:
             data_to_save = {
                 'hash': quote_hash,
                 'date': quote_data['date'],
                 'title': quote_data['title'],
-                'sent_at': datetime.now().isoformat(),
+                'sent_at': sent_at,
                 'fetch_date': quote_data['fetch_date'],
-                'content_preview': quote_data['content'][:100] + "..." if len(quote_data['content']) > 100 else quote_data['content']
+                'content_preview': quote_data['content'][:100] + "..." if len(quote_data['content']) > 100 else quote_data['content'],
+                'etag': quote_data.get('etag', ''),
+                'last_modified': quote_data.get('last_modified', ''),
+                'body_fingerprint': quote_data.get('body_fingerprint', ''),
+                'simhash': f"{fingerprint:016x}"
             }
-            with open(self.quote_tracking_file, 'w', encoding='utf-8') as f:
-                json.dump(data_to_save, f, indent=2, ensure_ascii=False)
+            self.write_state(data_to_save)
             logger.info(f"Quote data saved successfully - Hash: {quote_hash[:8]}...")
         except Exception as e:
             logger.error(f"Could not save quote data: {e}")
 
+    def save_validators(self, quote_data):
+        """Store fresh HTTP validators and body fingerprint for an unchanged quote
+
+        Only called once the quote is known to be the one already sent, so a
+        failed send can never be masked by a later 304 response or matching
+        fingerprint.
+        """
+        last_data = self.load_last_quote_data()
+        if not last_data:
+            return
+        validators = {name: quote_data.get(name, '') for name in ('etag', 'last_modified', 'body_fingerprint')}
+        if all(last_data.get(name, '') == value for name, value in validators.items()):
+            return
+        last_data.update(validators)
+        try:
+            self.write_state(last_data)
+            logger.info("HTTP validators updated")
+        except Exception as e:
+            logger.error(f"Could not save HTTP validators: {e}")
+
     def is_new_quote(self, current_quote_data):
         """Check if this is a new quote we haven't sent before"""
         current_hash = self.get_quote_hash(current_quote_data)
         last_data = self.load_last_quote_data()
         
         logger.info(f"Current quote hash: {current_hash[:8]}...")
+
+        if self.archive:
+            with self.metrics.span('state_io'):
+                already_sent = self.archive.has_sent(current_hash)
+        else:
+            already_sent = False
+        if already_sent:
+            logger.info("Quote was already sent before (found in archive) - skipping")
+            return False, current_hash
         
         if not last_data:
+            if self.is_near_duplicate(current_quote_data):
+                return False, current_hash
             logger.info("No previous quote data found - this is a new quote")
             return True, current_hash
         
         last_hash = last_data.get('hash', '')
         logger.info(f"Last quote hash: {last_hash[:8]}...")
         
-        if current_hash != last_hash:
-            logger.info("Quote content has changed - this is a new quote!")
-            return True, current_hash
-        else:
+        if current_hash == last_hash:
             logger.info("Quote content is the same as last time - skipping")
             return False, current_hash
 
+        if self.is_near_duplicate(current_quote_data, last_data):
+            return False, current_hash
+
+        logger.info("Quote content has changed - this is a new quote!")
+        return True, current_hash
+
+    def is_near_duplicate(self, quote_data, last_data=None):
+        """Check the quote's SimHash against the archive and the last sent quote"""
+        if self.near_duplicate_distance is None:
+            return False
+        with self.metrics.span('hash'):
+            fingerprint = get_quote_simhash(quote_data)
+        if self.archive:
+            with self.metrics.span('state_io'):
+                match = self.archive.find_near_duplicate(fingerprint, self.near_duplicate_distance)
+            if match:
+                logger.info(f"Quote is a near-duplicate of archived quote {match[0][:8]}... "
+                            f"(distance {match[1]}) - skipping")
+                return True
+        if last_data and last_data.get('simhash'):
+            distance = hamming_distance(fingerprint, int(last_data['simhash'], 16))
+            if distance <= self.near_duplicate_distance:
+                logger.info(f"Quote is a near-duplicate of the last quote (distance {distance}) - skipping")
+                return True
+        return False
+
     def fetch_daily_quote(self):
-        """Fetch the daily motivational quote from greatday.com"""
-        try:
-            url = "https://www.greatday.com/"
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-                'Sec-Fetch-Dest': 'document',
-                'Sec-Fetch-Mode': 'navigate',
-                'Sec-Fetch-Site': 'none',
-                'Sec-Fetch-User': '?1',
-                'Cache-Control': 'no-cache'
-            }
+        """Fetch the daily quote from the configured sources (sync wrapper)"""
+        return asyncio.run(self.fetch_quote_async())
 
-            logger.info("Fetching quote from greatday.com...")
-            
-            # Add retry logic
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    response = requests.get(url, headers=headers, timeout=30, allow_redirects=True)
-                    response.raise_for_status()
-                    break
-                except requests.exceptions.RequestException as e:
-                    logger.warning(f"Attempt {attempt + 1} failed: {e}")
-                    if attempt < max_retries - 1:
-                        time.sleep(2)
-                    else:
-                        raise
-            
-            logger.info(f"Response status: {response.status_code}")
-            logger.info(f"Response size: {len(response.content)} bytes")
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Debug: Save first 1000 chars of content for debugging
-            content_preview = soup.get_text()[:1000]
-            logger.info(f"Content preview: {content_preview[:200]}...")
-            
-            content_text = soup.get_text()
-            lines = [line.strip() for line in content_text.split('\n') if line.strip()]
-
-            # Parse the content
-            date_str = ""
-            title = ""
-            content = []
-            author = "Ralph Marston"
-
-            # Find date and title with improved detection
-            for i, line in enumerate(lines):
-                # Look for day names in the line
-                if any(day in line for day in ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']):
-                    date_str = line
-                    # Look for title in next few lines
-                    for j in range(i + 1, min(i + 4, len(lines))):
-                        potential_title = lines[j]
-                        # Title is usually short and not too long
-                        if (len(potential_title) > 5 and 
-                            len(potential_title) < 100 and 
-                            not any(skip_word in potential_title.lower() for skip_word in 
-                                   ['copyright', 'ralph marston', 'greatday', 'http', 'www'])):
-                            title = potential_title
-                            break
-                    break
+    async def fetch_quote_async(self):
+        """Fetch all sources in parallel and use the best-ranked valid result
 
-            # Extract main content with improved filtering
-            content_started = False
-            title_found = False
-            
-            for line in lines:
-                # Start collecting content after we find the title
-                if line == title and title and not title_found:
-                    content_started = True
-                    title_found = True
+        Each source runs on the worker pool under one shared deadline. A
+        result is used as soon as every higher-ranked source has finished
+        without a quote, so a slow or down site only delays the run until
+        the deadline. Falls back to a built-in quote if nothing arrives.
+        """
+        loop = asyncio.get_running_loop()
+        executor = self.get_executor()
+        tasks = [asyncio.ensure_future(loop.run_in_executor(executor, provider.fetch, self))
+                 for provider in self.providers]
+        deadline = loop.time() + self.source_deadline
+        pending = set(tasks)
+
+        def best_result(require_ranked):
+            for provider, task in zip(self.providers, tasks):
+                if not task.done():
+                    if require_ranked:
+                        return None
                     continue
-                elif content_started:
-                    # Stop conditions
-                    if (line.startswith('Ralph Marston') or 
-                        line == 'Ralph Marston' or
-                        '— Ralph' in line):
-                        if author == "Ralph Marston":
-                            author = line
-                        break
-                    elif any(word in line.lower() for word in [
-                        'copyright', 'previous', 'permission', 'subscribe', 'email', 
-                        'greatday.com', 'make a plan', 'weekly focus', 'archives',
-                        'home', 'contact', 'privacy', 'terms', 'navigate'
-                    ]):
-                        break
-                    # Include valid content lines
-                    elif (line and 
-                          len(line) > 15 and 
-                          not line.startswith('http') and
-                          not line.startswith('—') and
-                          '©' not in line and
-                          not line.isupper() and  # Skip navigation/header text
-                          len(line.split()) > 3):  # Ensure it's a proper sentence
-                        content.append(line)
-
-            # Fallback parsing if main method didn't work
-            if not date_str or not title or not content:
-                logger.warning("Primary parsing failed, trying fallback method...")
-                
-                # Try to find any meaningful content
-                all_text = ' '.join(lines)
-                
-                # Look for patterns that might be the quote
-                paragraphs = [p.strip() for p in all_text.split('.') if len(p.strip()) > 50]
-                
-                if paragraphs:
-                    content = [paragraphs[0] + '.']  # Take first substantial paragraph
-                
-                if not date_str:
-                    date_str = datetime.now().strftime("%A, %B %d, %Y")
-                if not title:
-                    title = "Daily Motivation"
-
-            # Final fallback
-            if not content:
-                logger.warning("Could not extract content, using fallback")
-                return self.get_fallback_quote()
+                if not task.cancelled() and task.exception() is None and task.result():
+                    logger.info(f"Using quote from source: {provider.name}")
+                    return task.result()
+            return None
 
-            quote_data = {
-                'date': date_str,
-                'title': title,
-                'content': '\n\n'.join(content),
-                'author': author,
-                'fetch_date': str(date.today())
-            }
+        try:
+            while pending:
+                result = best_result(require_ranked=True)
+                if result:
+                    return result
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    logger.warning(f"Source deadline of {self.source_deadline}s reached")
+                    break
+                _, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
 
-            logger.info(f"Successfully parsed quote:")
-            logger.info(f"  Date: {date_str}")
-            logger.info(f"  Title: {title}")
-            logger.info(f"  Content length: {len(quote_data['content'])} chars")
-            logger.info(f"  Content paragraphs: {len(content)}")
-            
-            return quote_data
+            result = best_result(require_ranked=False)
+            if result:
+                return result
+        finally:
+            for task in pending:
+                task.cancel()
 
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Network error fetching quote: {e}")
-            return self.get_fallback_quote()
-        except Exception as e:
-            logger.error(f"Error fetching quote: {e}")
-            import traceback
-            logger.error(f"Traceback: {traceback.format_exc()}")
-            return self.get_fallback_quote()
+        logger.warning("No source returned a quote, using fallback")
+        self.metrics.increment('fallbacks')
+        return self.get_fallback_quote()
 
     def get_fallback_quote(self):
         """Return a fallback motivational quote if website is unavailable"""
@@ -267,7 +2103,6 @@ class DailyQuoteBot:
             }
         ]
         
-        import random
         selected_quote = random.choice(fallback_quotes)
         
         return {
@@ -278,91 +2113,342 @@ class DailyQuoteBot:
             'fetch_date': str(date.today())
         }
 
-    def send_to_telegram(self, message):
-        """Send message to Telegram"""
+    def send_to_telegram(self, message, chat_id=None):
+        """Send message to a single Telegram chat (defaults to the first chat)
+
+        Long messages are split and sent as ordered parts.
+        """
+        if chat_id is None:
+            chat_id = self.chat_id
+        for part in message_parts(message):
+            if not self.post_message(part, chat_id)['ok']:
+                return False
+        return True
+
+    def post_message(self, message, chat_id):
+        """Send one message and describe the outcome for the delivery scheduler
+
+        message is either HTML text or a rendered Message with its parse mode,
+        already within Telegram's length limit (see message_parts).
+        Returns a dict with 'ok', plus 'retry_after' for 429 answers and
+        'transient' for network errors and 5xx answers worth retrying.
+        """
+        if isinstance(message, Message):
+            message, parse_mode = message
+        else:
+            parse_mode = 'HTML'
         try:
             url = f"{self.base_url}/sendMessage"
-            
-            # Split message if too long
-            max_length = 4000
-            if len(message) > max_length:
-                message = message[:max_length-10] + "...\n\n[Truncated]"
-            
+
             data = {
-                'chat_id': str(self.chat_id),
+                'chat_id': str(chat_id),
                 'text': message,
-                'parse_mode': 'HTML',
                 'disable_web_page_preview': True
             }
+            if parse_mode:
+                data['parse_mode'] = parse_mode
 
-            logger.info(f"Sending message to Telegram (length: {len(message)} chars)")
-            response = requests.post(url, data=data, timeout=30)
+            logger.info(f"Sending message to Telegram chat {chat_id} (length: {len(message)} chars)")
+            with self.metrics.span('send'):
+                response = self.get_session(url).post(url, data=data, timeout=30)
             
             logger.info(f"Telegram response status: {response.status_code}")
+
+            try:
+                result = response.json()
+            except ValueError:
+                result = None
+            if not isinstance(result, dict):
+                result = {}
             
+            if response.status_code == 200 and result.get('ok'):
+                logger.info("✅ Message sent successfully to Telegram")
+                self.metrics.increment('messages_sent')
+                return {'ok': True}
+            if response.status_code == 429:
+                self.metrics.increment('telegram_throttled')
+                retry_after = (result.get('parameters') or {}).get('retry_after', 1)
+                return {'ok': False, 'retry_after': retry_after, 'description': result.get('description', '')}
             if response.status_code == 200:
-                result = response.json()
-                if result.get('ok'):
-                    logger.info("✅ Message sent successfully to Telegram")
-                    return True
-                else:
-                    logger.error(f"❌ Telegram API error: {result}")
-                    return False
+                logger.error(f"❌ Telegram API error: {result}")
             else:
                 logger.error(f"❌ HTTP error: {response.status_code} - {response.text}")
-                return False
+            self.metrics.increment('send_errors')
+            return {'ok': False, 'transient': response.status_code >= 500,
+                    'description': result.get('description', response.text)}
 
         except Exception as e:
             logger.error(f"❌ Error sending to Telegram: {e}")
-            return False
+            self.metrics.increment('send_errors')
+            return {'ok': False, 'transient': True, 'description': str(e)}
+
+    def send_to_chats(self, message, chat_ids=None, priority=0, on_result=None):
+        """Fan the message out to all subscriber chats concurrently (sync wrapper)"""
+        return asyncio.run(self.send_to_chats_async(message, chat_ids, priority, on_result))
+
+    async def send_to_chats_async(self, message, chat_ids=None, priority=0, on_result=None,
+                                  on_progress=None):
+        """Fan the message out to all subscriber chats concurrently
+
+        Sends go through the bot's delivery scheduler, which keeps up to
+        max_workers sends in flight within Telegram's global and per-chat
+        rate limits and retries throttled or transient failures.
+        message may also be a callable returning the message for a chat id.
+        Long messages go out as ordered parts (see split_message).
+        on_result(chat_id, ok, retryable) is called as each chat settles and
+        on_progress(chat_id, parts_sent) after each delivered part.
+        Returns a dict mapping chat id to True/False.
+        """
+        if chat_ids is None:
+            chat_ids = self.chat_ids
+        if not chat_ids:
+            logger.error("❌ No chat ids configured")
+            return {}
+
+        start = time.monotonic()
+        message_for = message if callable(message) else (lambda chat: message)
+        jobs = []
+        for chat in chat_ids:
+            chat_message = message_for(chat)
+            parts = chat_message if isinstance(chat_message, list) else message_parts(chat_message)
+            jobs.append((priority, chat, parts))
+        results = await self.delivery.deliver(jobs, self.get_executor(), on_result, on_progress)
+        elapsed = time.monotonic() - start
+
+        delivered = sum(1 for ok in results.values() if ok)
+        failed = [chat for chat, ok in results.items() if not ok]
+        throughput = len(results) / elapsed if elapsed > 0 else float(len(results))
+        logger.info(f"📤 Delivered to {delivered}/{len(results)} chats in {elapsed:.2f}s ({throughput:.1f} msg/s)")
+        if failed:
+            logger.warning(f"Failed chats: {', '.join(failed)}")
+        return results
+
+    async def deliver_quote(self, quote_data, quote_hash):
+        """Send a new quote to every chat, resuming from the outbox if enabled
+
+        Each chat gets the quote rendered in its own format and locale, split
+        into ordered parts when it is too long for one message. Returns
+        (delivered, retrying): whether at least one chat has received the
+        quote, and whether some chat failed with a retryable error and should
+        get it on the next run. With the outbox, chats delivered by an earlier
+        run are not sent again and count towards delivered; without it
+        nothing is retried, since a re-run would send to every chat again.
+        """
+        def message(chat):
+            return message_parts(self.render_message(quote_data, *self.chat_variants.get(chat, (None, None))))
+
+        if not self.outbox:
+            results = await self.send_to_chats_async(message)
+            return any(results.values()), False
+
+        self.outbox.enqueue(quote_hash, self.chat_ids)
+        pending = self.outbox.pending(quote_hash)
+        if len(pending) < len(self.chat_ids):
+            logger.info(f"📬 Resuming delivery: {len(pending)} of {len(self.chat_ids)} chats still pending")
+
+        if pending:
+            offsets = {str(chat): parts_sent for chat, parts_sent in pending.items()}
+            await self.send_to_chats_async(
+                lambda chat: message(chat)[offsets[str(chat)]:], list(pending),
+                on_result=lambda chat, ok, retryable: self.outbox.mark(quote_hash, chat, ok, retryable),
+                on_progress=lambda chat, sent: self.outbox.mark_progress(quote_hash, chat,
+                                                                         offsets[str(chat)] + sent))
+        summary = self.outbox.summary(quote_hash)
+        logger.info(f"Outbox status: {summary}")
+        return bool(summary.get('delivered')), bool(summary.get('failed') or summary.get('pending'))
 
     def format_message(self, quote_data):
-        """Format the quote message for Telegram"""
-        message = f"🌟 <b>Daily Motivator</b>\n\n"
-        message += f"📅 <i>{quote_data['date']}</i>\n\n"
-        message += f"<b>{quote_data['title']}</b>\n\n"
-        message += f"{quote_data['content']}\n\n"
-        message += f"— <i>{quote_data['author']}</i>"
+        """Format the quote message for Telegram (HTML, as text)"""
+        return self.render_message(quote_data, 'html').text
+
+    def render_message(self, quote_data, message_format=None, locale=None):
+        """Render the quote with the template for a format and locale
+
+        Rendered messages are cached by (quote hash, format, locale), so a
+        fan-out renders each variant once no matter how many chats get it.
+        The cache key's hash is not timed as a 'hash' span, which would
+        otherwise count once per chat.
+        """
+        message_format = message_format or self.message_format
+        locale = locale if locale in MESSAGE_LABELS else self.locale
+        key = (compute_quote_hash(quote_data), message_format, locale)
+        message = self.render_cache.get(key)
+        if message is not None:
+            self.render_cache.move_to_end(key)
+            return message
+
+        with self.metrics.span('render'):
+            template, escape, parse_mode = MESSAGE_FORMATS[message_format]
+            fields = {name: escape(str(quote_data[name])) for name in ('date', 'title', 'content', 'author')}
+            fields.update({name: escape(value) for name, value in MESSAGE_LABELS[locale].items()})
+            message = Message(template.substitute(fields), parse_mode)
+
+        self.render_cache[key] = message
+        if len(self.render_cache) > RENDER_CACHE_SIZE:
+            self.render_cache.popitem(last=False)
         return message
 
     def run(self):
         """Main function to fetch and send daily quote"""
+        return asyncio.run(self.run_async())
+
+    async def run_async(self):
+        """Fetch, dedupe, format and fan out the daily quote on an event loop
+
+        Blocking work (HTTP, parsing, state file I/O) runs on the bot's worker
+        pool, so several bots or sources can share one loop while deliveries
+        to many chats overlap with bounded concurrency. Stage timings and
+        counters for the run are logged and, with metrics_path, exported.
+
+        The whole run holds a non-blocking lock next to the state file, so
+        overlapping runs sharing that state (a manual dispatch racing the
+        cron, several workers on one host) skip at once instead of both
+        passing the new-quote check and sending twice.
+        """
+        self.metrics.reset()
+        result = None
+        try:
+            with self.metrics.span('run'), try_locked_file(f"{self.quote_tracking_file}.run.lock") as acquired:
+                if acquired:
+                    result = await self.run_stages()
+                else:
+                    logger.info("🔒 Another instance is running - skipped")
+                    self.metrics.increment('lock_contention')
+                    result = "Another instance is running - skipped"
+            return result
+        finally:
+            self.metrics.finish(result)
+            logger.info(f"⏱️ Stage timings: {self.metrics.summary()}")
+            if self.metrics_path:
+                try:
+                    self.metrics.write(self.metrics_path)
+                except OSError as e:
+                    logger.error(f"Could not write metrics file: {e}")
+
+    async def run_stages(self):
+        """The stages of a single run; returns the run's result message"""
         logger.info("🚀 Starting daily quote bot...")
         logger.info(f"Current time: {datetime.now().isoformat()}")
 
-        # Fetch quote
-        quote_data = self.fetch_daily_quote()
+        loop = asyncio.get_running_loop()
+        executor = self.get_executor()
+
+        # Fetch and parse the quote from all sources off the event loop
+        quote_data = await self.fetch_quote_async()
         
         if not quote_data:
             error_msg = "❌ Sorry, couldn't fetch today's quote. Please try again later."
-            self.send_to_telegram(error_msg)
+            await self.send_to_chats_async(error_msg)
             return "Failed to fetch quote"
 
+        if quote_data.get('not_modified'):
+            if 'body_fingerprint' in quote_data:
+                # The page changed outside the quote region; keep its new validators
+                await loop.run_in_executor(executor, self.save_validators, quote_data)
+            logger.info("📋 Source page hasn't changed since last check - skipping send")
+            return "No new quote - skipped"
+
         # Check if this is a new quote
-        is_new, current_hash = self.is_new_quote(quote_data)
+        is_new, current_hash = await loop.run_in_executor(executor, self.is_new_quote, quote_data)
         
         if not is_new:
+            self.metrics.increment('skipped_duplicates')
+            await loop.run_in_executor(executor, self.save_validators, quote_data)
             logger.info("📋 Quote hasn't changed since last check - skipping send")
             return "No new quote - skipped"
 
         # Format and send message
-        message = self.format_message(quote_data)
-        
-        if self.send_to_telegram(message):
-            # Save quote data only after successful send
-            self.save_quote_data(quote_data, current_hash)
+        with self.metrics.span('deliver'):
+            delivered, retrying = await self.deliver_quote(quote_data, current_hash)
+        if delivered and retrying:
+            # Leave the state alone so the quote still counts as new and the
+            # next run sends it to the chats the outbox still has as failed
+            logger.warning("⚠️ Quote sent to some chats - the rest are retried on the next run")
+            return "Quote partially sent"
+        elif delivered:
+            # Save quote data only after a successful send, so failed chats
+            # don't cause the quote to be re-sent to everyone on the next run
+            await loop.run_in_executor(executor, self.save_quote_data, quote_data, current_hash)
             logger.info("✅ New quote sent successfully!")
             return "New quote sent successfully"
         else:
             logger.error("❌ Failed to send quote")
             return "Failed to send quote"
 
-def main():
-    """Main function - gets credentials from environment variables"""
-    
+    def run_forever(self, schedules, poll_min=DEFAULT_POLL_MIN, poll_max=DEFAULT_POLL_MAX, stop_event=None):
+        """Resident scheduler: run on cron ticks and poll adaptively in between
+
+        Sessions, the worker pool and parser state stay warm between ticks.
+        After a tick that finds no new quote the bot re-checks after poll_min
+        seconds, doubling the delay up to poll_max while the source stays
+        unchanged. Once a new quote is sent, polling stops until the next cron
+        tick. A poll_min of 0 disables polling between ticks.
+        """
+        stop_event = stop_event or threading.Event()
+        poll_interval = None
+        next_poll = None
+        logger.info(f"🕒 Daemon started with schedule: {'; '.join(s.expression for s in schedules)}")
+
+        while not stop_event.is_set():
+            now = datetime.now(timezone.utc)
+            wake_at = min(schedule.next_after(now) for schedule in schedules)
+            if next_poll and next_poll < wake_at:
+                wake_at = next_poll
+            else:
+                # A cron tick comes first and starts a fresh polling cycle
+                poll_interval = None
+
+            logger.info(f"Next check at {wake_at.isoformat()}")
+            if stop_event.wait(max(0.0, (wake_at - datetime.now(timezone.utc)).total_seconds())):
+                break
+
+            try:
+                result = self.run()
+            except Exception as e:
+                logger.error(f"❌ Scheduled run failed: {e}")
+                result = None
+            logger.info(f"Tick result: {result}")
+
+            if result == "New quote sent successfully" or not poll_min:
+                poll_interval = None
+                next_poll = None
+            else:
+                poll_interval = poll_min if poll_interval is None else min(poll_interval * 2, poll_max)
+                next_poll = datetime.now(timezone.utc) + timedelta(seconds=poll_interval)
+
+        logger.info("🛑 Daemon stopped")
+
+def build_bot_from_env():
+    """Create the bot from environment variables (GitHub secrets)"""
+
     # Get credentials from environment variables (GitHub secrets)
     TELEGRAM_BOT_TOKEN = os.environ.get('TELEGRAM_BOT_TOKEN')
-    TELEGRAM_CHAT_ID = os.environ.get('TELEGRAM_CHAT_ID')
+    TELEGRAM_CHAT_ID = os.environ.get('TELEGRAM_CHAT_ID', '')
+    TELEGRAM_CHAT_IDS_FILE = os.environ.get('TELEGRAM_CHAT_IDS_FILE')
+    TELEGRAM_MAX_WORKERS = int(os.environ.get('TELEGRAM_MAX_WORKERS', DEFAULT_MAX_WORKERS))
+    HTTP_POOL_SIZE = int(os.environ.get('HTTP_POOL_SIZE', 0)) or None
+    QUOTE_PARSER = os.environ.get('QUOTE_PARSER', DEFAULT_PARSER)
+    QUOTE_ARCHIVE_DB = os.environ.get('QUOTE_ARCHIVE_DB')
+    QUOTE_SIMHASH_DISTANCE = int(os.environ.get('QUOTE_SIMHASH_DISTANCE', DEFAULT_SIMHASH_DISTANCE))
+    QUOTE_SOURCES = os.environ.get('QUOTE_SOURCES', DEFAULT_SOURCES)
+    QUOTE_SOURCE_DEADLINE = float(os.environ.get('QUOTE_SOURCE_DEADLINE', DEFAULT_SOURCE_DEADLINE))
+    QUOTE_FETCH_BUDGET = float(os.environ.get('QUOTE_FETCH_BUDGET', min(DEFAULT_FETCH_BUDGET, QUOTE_SOURCE_DEADLINE)))
+    QUOTE_HEDGE_AFTER = float(os.environ.get('QUOTE_HEDGE_AFTER', DEFAULT_HEDGE_AFTER))
+    QUOTE_OUTBOX_DB = os.environ.get('QUOTE_OUTBOX_DB')
+
+    QUOTE_MESSAGE_FORMAT = os.environ.get('QUOTE_MESSAGE_FORMAT', DEFAULT_MESSAGE_FORMAT).lower()
+    QUOTE_LOCALE = os.environ.get('QUOTE_LOCALE', DEFAULT_LOCALE)
+    QUOTE_BOT_METRICS_FILE = os.environ.get('QUOTE_BOT_METRICS_FILE')
+    QUOTE_MAX_BODY_BYTES = int(os.environ.get('QUOTE_MAX_BODY_BYTES', DEFAULT_MAX_BODY_BYTES))
+    QUOTE_BOT_STATE_FORMAT = os.environ.get('QUOTE_BOT_STATE_FORMAT', DEFAULT_STATE_FORMAT).lower()
+    QUOTE_BOT_STATE_FILE = os.environ.get('QUOTE_BOT_STATE_FILE')
+    QUOTE_RESPONSE_ARCHIVE = os.environ.get('QUOTE_RESPONSE_ARCHIVE')
+
+    chat_ids = parse_chat_ids(TELEGRAM_CHAT_ID)
+    chat_variants = {}
+    if TELEGRAM_CHAT_IDS_FILE:
+        chat_ids = parse_chat_ids(chat_ids + load_chat_ids_file(TELEGRAM_CHAT_IDS_FILE))
+        chat_variants = load_chat_variants(TELEGRAM_CHAT_IDS_FILE)
 
     # Validate credentials
     if not TELEGRAM_BOT_TOKEN:
@@ -370,17 +2456,193 @@ def main():
         logger.error("Please add your bot token to GitHub secrets")
         sys.exit(1)
         
-    if not TELEGRAM_CHAT_ID:
+    if not chat_ids:
         logger.error("❌ TELEGRAM_CHAT_ID environment variable not found")
         logger.error("Please add your chat ID to GitHub secrets")
         sys.exit(1)
 
     logger.info(f"Bot token: {TELEGRAM_BOT_TOKEN[:10]}...")
-    logger.info(f"Chat ID: {TELEGRAM_CHAT_ID}")
+    logger.info(f"Chat IDs: {len(chat_ids)} subscriber(s)")
+
+    return DailyQuoteBot(TELEGRAM_BOT_TOKEN, chat_ids, max_workers=TELEGRAM_MAX_WORKERS,
+                         pool_size=HTTP_POOL_SIZE, parser=QUOTE_PARSER,
+                         archive_path=QUOTE_ARCHIVE_DB,
+                         near_duplicate_distance=QUOTE_SIMHASH_DISTANCE if QUOTE_SIMHASH_DISTANCE >= 0 else None,
+                         providers=create_providers(QUOTE_SOURCES),
+                         source_deadline=QUOTE_SOURCE_DEADLINE,
+                         fetch_policy=FetchPolicy(budget=QUOTE_FETCH_BUDGET, hedge_after=QUOTE_HEDGE_AFTER),
+                         outbox_path=QUOTE_OUTBOX_DB, message_format=QUOTE_MESSAGE_FORMAT,
+                         locale=QUOTE_LOCALE, chat_variants=chat_variants,
+                         metrics_path=QUOTE_BOT_METRICS_FILE, max_body_bytes=QUOTE_MAX_BODY_BYTES,
+                         state_format=QUOTE_BOT_STATE_FORMAT, response_archive_path=QUOTE_RESPONSE_ARCHIVE,
+                         state_path=QUOTE_BOT_STATE_FILE)
+
+def run_daemon(args):
+    """Run the bot as a resident scheduler until SIGINT/SIGTERM"""
+    expressions = args.cron or [e for e in os.environ.get('QUOTE_BOT_CRON', DEFAULT_CRON).split(';') if e.strip()]
+    schedules = [CronSchedule(expression) for expression in expressions]
+
+    stop_event = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop_event.set())
+
+    bot = build_bot_from_env()
+    try:
+        bot.run_forever(schedules, poll_min=args.poll_min, poll_max=args.poll_max, stop_event=stop_event)
+    finally:
+        bot.close()
+
+REPLAY_PAGE_SUFFIXES = ('.html', '.htm')
+DEFAULT_REPLAY_BATCH = 64
+
+
+def iter_replay_pages(source):
+    """Yield (name, page) for every saved page in a directory, tarball or response archive
+
+    Directory and archive pages are yielded as paths, so workers read and
+    decompress them themselves; tarball members are read here and yielded
+    as bytes.
+    """
+    if os.path.isdir(source) and ResponseArchive.is_archive(source):
+        archive = ResponseArchive(source)
+        try:
+            yield from archive.pages()
+        finally:
+            archive.close()
+        return
+    if os.path.isdir(source):
+        for root, _, files in os.walk(source):
+            for name in sorted(files):
+                if name.lower().endswith(REPLAY_PAGE_SUFFIXES):
+                    path = os.path.join(root, name)
+                    yield os.path.relpath(path, source), path
+        return
+
+    import tarfile
+    with tarfile.open(source, 'r:*') as archive:
+        for member in archive:
+            if member.isfile() and member.name.lower().endswith(REPLAY_PAGE_SUFFIXES):
+                yield member.name, archive.extractfile(member).read()
+
+
+def init_replay_worker():
+    """Keep per-page parse warnings out of the JSONL output"""
+    logging.disable(logging.WARNING)
+
+
+def replay_batch(pages, engine):
+    """Parse a batch of (name, path or bytes) pages exactly like the greatday fetch"""
+    results = []
+    for name, page in pages:
+        record = {'source': name}
+        try:
+            if isinstance(page, str):
+                page = read_page(page)
+            parsed = parse_quote_lines(PARSER_ENGINES[engine](page), fill_missing_date=False)
+            record['body_fingerprint'] = body_fingerprint(page)
+            if parsed:
+                record.update(date=parsed['date'] or None, title=parsed['title'],
+                              content='\n\n'.join(parsed['content']), author=parsed['author'],
+                              fallback=parsed['fallback'])
+            else:
+                record['error'] = "no quote found"
+        except Exception as e:
+            record['error'] = str(e)
+        results.append(record)
+    return results
+
+
+def replay_pages(pages, engine=DEFAULT_PARSER, workers=None, batch_size=DEFAULT_REPLAY_BATCH):
+    """Parse pages in batches on a process pool and yield records in input order
+
+    At most two batches per worker are in flight, so a huge tarball is
+    never read into memory at once.
+    """
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_replay_worker) as pool:
+        in_flight = deque()
+        batch = []
+        for page in pages:
+            batch.append(page)
+            if len(batch) >= batch_size:
+                in_flight.append(pool.submit(replay_batch, batch, engine))
+                batch = []
+                if len(in_flight) >= workers * 2:
+                    yield from in_flight.popleft().result()
+        if batch:
+            in_flight.append(pool.submit(replay_batch, batch, engine))
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+
+def run_replay(args):
+    """Re-extract quotes from saved pages and write one JSON object per line"""
+    if args.parser not in PARSER_ENGINES:
+        raise SystemExit(f"Unknown parser engine: {args.parser}")
+    if not os.path.exists(args.source):
+        raise SystemExit(f"Replay source not found: {args.source}")
+    if not os.path.isdir(args.source):
+        import tarfile
+        if not tarfile.is_tarfile(args.source):
+            raise SystemExit(f"Replay source is neither a directory nor a tarball: {args.source}")
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    counts = {'pages': 0, 'fallback': 0, 'errors': 0}
+    start = time.perf_counter()
+    try:
+        for record in replay_pages(iter_replay_pages(args.source), args.parser, args.workers, args.batch_size):
+            output.write(json.dumps(record, ensure_ascii=False) + '\n')
+            counts['pages'] += 1
+            counts['fallback'] += bool(record.get('fallback'))
+            counts['errors'] += 'error' in record
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        else:
+            output.flush()
+    elapsed = time.perf_counter() - start
+    print(f"Replayed {counts['pages']} pages in {elapsed:.2f}s "
+          f"({counts['fallback']} fallback, {counts['errors']} errors)", file=sys.stderr)
+
+
+def main(argv=None):
+    """Main function - gets credentials from environment variables"""
+    import argparse
+    parser = argparse.ArgumentParser(description="Send the daily greatday.com quote to Telegram")
+    subcommands = parser.add_subparsers(dest='command')
+
+    daemon = subcommands.add_parser('daemon', help="run as a resident scheduler instead of a single run")
+    daemon.add_argument('--cron', action='append',
+                        help=f"cron expression in UTC, repeatable (default: QUOTE_BOT_CRON or '{DEFAULT_CRON}')")
+    daemon.add_argument('--poll-min', type=float, default=float(os.environ.get('QUOTE_BOT_POLL_MIN', DEFAULT_POLL_MIN)),
+                        help="first re-check delay in seconds after an unchanged tick (0 disables polling)")
+    daemon.add_argument('--poll-max', type=float, default=float(os.environ.get('QUOTE_BOT_POLL_MAX', DEFAULT_POLL_MAX)),
+                        help="maximum re-check delay in seconds")
+
+    replay = subcommands.add_parser('replay', help="re-extract quotes from saved HTML pages as JSONL")
+    replay.add_argument('source', help="directory or tarball (.tar, .tar.gz, ...) of saved HTML pages, "
+                                       "or a QUOTE_RESPONSE_ARCHIVE directory")
+    replay.add_argument('--parser', default=os.environ.get('QUOTE_PARSER', DEFAULT_PARSER),
+                        help=f"text extraction engine: {', '.join(PARSER_ENGINES)}")
+    replay.add_argument('--workers', type=int, help="worker processes (default: CPU count)")
+    replay.add_argument('--batch-size', type=int, default=DEFAULT_REPLAY_BATCH,
+                        help="pages handed to a worker at a time")
+    replay.add_argument('--output', help="write JSONL to this file instead of stdout")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'daemon':
+        run_daemon(args)
+        return
+    if args.command == 'replay':
+        run_replay(args)
+        return
 
     # Create and run bot
-    bot = DailyQuoteBot(TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID)
-    result = bot.run()
+    bot = build_bot_from_env()
+    try:
+        result = bot.run()
+    finally:
+        bot.close()
     logger.info(f"Final result: {result}")
 
 if __name__ == "__main__":
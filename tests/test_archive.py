@@ -0,0 +1,90 @@
+"""Archive tests: SimHash fingerprints and near-duplicate lookups"""
+
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import daily_quote_bot  # noqa: E402
+from daily_quote_bot import SIMHASH_BITS, get_quote_simhash, hamming_distance, simhash  # noqa: E402
+
+QUOTE = {
+    'date': 'Saturday, October 17, 2026',
+    'title': 'Spice it up',
+    'content': ("Merely meeting expectations is not enough. Add some spice to what you do, and give it "
+                "the energy of your own unique perspective. Do what is expected, and then go further. "
+                "Find a way to make it better, to make it more valuable, more useful, more enjoyable.\n\n"
+                "When you add your own special touch, you create real value. Instead of merely getting "
+                "by, you make a positive difference."),
+    'author': 'Ralph Marston',
+    'fetch_date': '2026-10-17'
+}
+
+OTHER = dict(QUOTE, title='Keep going', content=(
+    "There are plenty of reasons to quit, and one very good reason to keep going. That reason is the "
+    "value you can create by persisting through the difficult parts of the journey."))
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = daily_quote_bot.QuoteArchive(str(tmp_path / 'archive.db'))
+    yield archive
+    archive.close()
+
+
+@pytest.mark.parametrize('change', [
+    lambda quote: dict(quote, content='  '.join(quote['content'].split(' '))),
+    lambda quote: dict(quote, content=quote['content'].upper(), title=quote['title'].lower()),
+    lambda quote: dict(quote, date='Sunday, October 18, 2026'),
+])
+def test_cosmetic_changes_are_near_duplicates(archive, change):
+    archive.record(QUOTE, 'original')
+    fingerprint = get_quote_simhash(change(QUOTE))
+    assert hamming_distance(fingerprint, get_quote_simhash(QUOTE)) <= daily_quote_bot.DEFAULT_SIMHASH_DISTANCE
+    assert archive.find_near_duplicate(fingerprint)[0] == 'original'
+
+
+def test_edit_after_the_hashed_prefix_changes_the_fingerprint():
+    edited = dict(QUOTE, content=QUOTE['content'].replace('positive difference', 'lasting difference'))
+    assert QUOTE['content'].index('positive difference') > 200
+    assert get_quote_simhash(edited) != get_quote_simhash(QUOTE)
+
+
+def test_unrelated_quotes_do_not_match(archive):
+    archive.record(QUOTE, 'original')
+    assert hamming_distance(get_quote_simhash(OTHER), get_quote_simhash(QUOTE)) > 3
+    assert archive.find_near_duplicate(get_quote_simhash(OTHER)) is None
+
+
+def test_fingerprints_round_trip_through_signed_sqlite_integers(archive):
+    for fingerprint in (0, 1, (1 << 63) - 1, 1 << 63, (1 << 64) - 1, simhash(QUOTE['content'])):
+        assert daily_quote_bot.from_signed64(daily_quote_bot.to_signed64(fingerprint)) == fingerprint
+        archive.record(QUOTE, f'q{fingerprint}', fingerprint=fingerprint)
+        assert archive.find_near_duplicate(fingerprint, 0) == (f'q{fingerprint}', 0)
+
+
+def test_band_lookup_finds_every_fingerprint_within_distance_three(archive):
+    rng = random.Random(17)
+
+    def flip(fingerprint, bits):
+        for bit in rng.sample(range(SIMHASH_BITS), bits):
+            fingerprint ^= 1 << bit
+        return fingerprint
+
+    queries = [rng.getrandbits(SIMHASH_BITS) for _ in range(50)]
+    stored = {}
+    for index, query in enumerate(queries):
+        fingerprint = flip(query, index % 4)
+        stored[f'near{index}'] = fingerprint
+        archive.record(QUOTE, f'near{index}', fingerprint=fingerprint)
+        far = flip(query, 4 + index % 8)
+        stored[f'far{index}'] = far
+        archive.record(QUOTE, f'far{index}', fingerprint=far)
+
+    for query in queries:
+        closest = min(hamming_distance(query, fingerprint) for fingerprint in stored.values())
+        assert closest <= 3
+        assert archive.find_near_duplicate(query)[1] == closest
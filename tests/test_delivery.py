@@ -0,0 +1,224 @@
+"""Delivery tests: outbox resume after failed runs and the rate-limited scheduler"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import daily_quote_bot  # noqa: E402
+from benchmarks.bench_parse import FIXTURES_DIR, FakeResponse  # noqa: E402
+
+
+class FakeTelegram:
+    """Serves a fixture page and answers sendMessage with a configurable status
+
+    statuses overrides status_code per chat id; every send is logged in sent.
+    """
+
+    def __init__(self, page, status_code=200, statuses=None):
+        self.page = page
+        self.status_code = status_code
+        self.statuses = statuses or {}
+        self.sent = []
+
+    @property
+    def sends(self):
+        return len(self.sent)
+
+    def get(self, url, **kwargs):
+        return FakeResponse(body=self.page)
+
+    def post(self, url, data=None, **kwargs):
+        chat_id = data['chat_id']
+        self.sent.append(chat_id)
+        status_code = self.statuses.get(chat_id, self.status_code)
+        if status_code == 200:
+            return FakeResponse(payload={'ok': True, 'result': {}})
+        return FakeResponse(payload={'ok': False, 'description': 'Failed'}, status_code=status_code)
+
+    def close(self):
+        pass
+
+
+def load_homepage():
+    with open(os.path.join(FIXTURES_DIR, 'homepage.html'), 'rb') as f:
+        return f.read()
+
+
+@pytest.fixture
+def bot(tmp_path):
+    bot = daily_quote_bot.DailyQuoteBot('0:test', ['1'], outbox_path=str(tmp_path / 'outbox.db'))
+    bot.quote_tracking_file = str(tmp_path / 'last_quote_data.json')
+    yield bot
+    bot.close()
+
+
+def test_outbox_retries_chats_that_failed_in_an_earlier_run(bot):
+    telegram = FakeTelegram(load_homepage(), status_code=403)
+    bot.get_session = lambda url: telegram
+
+    assert bot.run() == "Failed to send quote"
+    assert telegram.sends == 1
+
+    telegram.status_code = 200
+    assert bot.run() == "New quote sent successfully"
+    assert telegram.sends == 2
+    assert bot.run() == "No new quote - skipped"
+    assert telegram.sends == 2
+
+
+def make_bot(tmp_path, chat_ids):
+    bot = daily_quote_bot.DailyQuoteBot('0:test', chat_ids, outbox_path=str(tmp_path / 'outbox.db'))
+    bot.quote_tracking_file = str(tmp_path / 'last_quote_data.json')
+    # Retry transient failures right away instead of after a jittered backoff
+    bot.delivery.max_attempts = 1
+    return bot
+
+
+def test_partial_transient_failure_is_retried_for_the_failed_chat_only(tmp_path):
+    bot = make_bot(tmp_path, ['1', '2'])
+    telegram = FakeTelegram(load_homepage(), statuses={'2': 502})
+    bot.get_session = lambda url: telegram
+    try:
+        assert bot.run() == "Quote partially sent"
+        assert sorted(telegram.sent) == ['1', '2']
+
+        telegram.statuses = {}
+        assert bot.run() == "New quote sent successfully"
+        assert sorted(telegram.sent) == ['1', '2', '2']
+        assert bot.run() == "No new quote - skipped"
+        assert telegram.sends == 3
+    finally:
+        bot.close()
+
+
+def test_partial_permanent_failure_is_not_retried(tmp_path):
+    bot = make_bot(tmp_path, ['1', '2'])
+    telegram = FakeTelegram(load_homepage(), statuses={'2': 403})
+    bot.get_session = lambda url: telegram
+    try:
+        assert bot.run() == "New quote sent successfully"
+        telegram.statuses = {}
+        assert bot.run() == "No new quote - skipped"
+        assert sorted(telegram.sent) == ['1', '2']
+        assert bot.outbox.summary(bot.load_last_quote_data()['hash']) == {'delivered': 1, 'rejected': 1}
+    finally:
+        bot.close()
+
+
+def make_scheduler(send=None, **kwargs):
+    return daily_quote_bot.DeliveryScheduler(send or (lambda message, chat_id: {'ok': True}), workers=2,
+                                             global_rate=1000, chat_rate=1000, **kwargs)
+
+
+class ScriptedSend:
+    """Telegram send stub answering each chat from a script of results
+
+    The last result of a chat's script repeats once it runs out.
+    """
+
+    def __init__(self, **scripts):
+        self.scripts = scripts
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def __call__(self, message, chat_id):
+        with self.lock:
+            script = self.scripts[chat_id]
+            calls = sum(1 for chat, _ in self.sent if chat == chat_id)
+            self.sent.append((chat_id, message))
+            return script[min(calls, len(script) - 1)]
+
+
+def deliver(scheduler, jobs):
+    """Run a delivery; return (results, [(chat_id, ok, retryable)], [(chat_id, parts_sent)])"""
+    settled = []
+    progress = []
+
+    async def run():
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            return await asyncio.wait_for(
+                scheduler.deliver(jobs, executor, lambda *args: settled.append(args),
+                                  lambda *args: progress.append(args)), timeout=10)
+
+    return asyncio.run(run()), settled, progress
+
+
+@pytest.fixture
+def no_jitter(monkeypatch):
+    monkeypatch.setattr(daily_quote_bot.random, 'uniform', lambda low, high: 0.0)
+
+
+THROTTLED = {'ok': False, 'retry_after': 0.2, 'description': 'Too Many Requests'}
+TRANSIENT = {'ok': False, 'transient': True, 'description': 'Bad Gateway'}
+PERMANENT = {'ok': False, 'transient': False, 'description': 'Forbidden'}
+
+
+def test_retry_after_pauses_the_chat_before_resending():
+    send = ScriptedSend(a=[THROTTLED, {'ok': True}])
+    start = time.monotonic()
+    results, settled, _ = deliver(make_scheduler(send), [(0, 'a', 'hi')])
+    assert results == {'a': True}
+    assert time.monotonic() - start >= 0.2
+    assert send.sent == [('a', 'hi'), ('a', 'hi')]
+
+
+def test_throttling_gives_up_after_max_throttles():
+    send = ScriptedSend(a=[dict(THROTTLED, retry_after=0)])
+    results, settled, _ = deliver(make_scheduler(send, max_throttles=2), [(0, 'a', 'hi')])
+    assert results == {'a': False}
+    assert settled == [('a', False, True)]
+    assert len(send.sent) == 3
+
+
+def test_transient_errors_are_retried_and_permanent_ones_are_not(no_jitter):
+    send = ScriptedSend(a=[TRANSIENT], b=[PERMANENT], c=[TRANSIENT, {'ok': True}])
+    results, settled, _ = deliver(make_scheduler(send, max_attempts=3),
+                                  [(0, 'a', 'hi'), (0, 'b', 'hi'), (0, 'c', 'hi')])
+    assert results == {'a': False, 'b': False, 'c': True}
+    assert sorted(settled) == [('a', False, True), ('b', False, False), ('c', True, False)]
+    assert [chat for chat, _ in send.sent].count('a') == 3
+    assert [chat for chat, _ in send.sent].count('b') == 1
+    assert [chat for chat, _ in send.sent].count('c') == 2
+
+
+def test_multipart_retry_resumes_at_the_failed_part_in_order(no_jitter):
+    send = ScriptedSend(a=[{'ok': True}, TRANSIENT, {'ok': True}])
+    results, _, progress = deliver(make_scheduler(send), [(0, 'a', ['one', 'two', 'three'])])
+    assert results == {'a': True}
+    assert send.sent == [('a', 'one'), ('a', 'two'), ('a', 'two'), ('a', 'three')]
+    assert progress == [('a', 1), ('a', 2), ('a', 3)]
+
+
+def test_failing_result_hook_does_not_hang_delivery():
+    def on_result(chat_id, ok, retryable):
+        raise RuntimeError("database is locked")
+
+    async def deliver():
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            return await asyncio.wait_for(
+                make_scheduler().deliver([(0, 'a', 'hi'), (0, 'b', 'hi')], executor, on_result), timeout=5)
+
+    assert asyncio.run(deliver()) == {'a': True, 'b': True}
+
+
+def test_worker_exception_is_raised_instead_of_hanging():
+    scheduler = make_scheduler()
+
+    async def broken_slot(chat_id):
+        raise RuntimeError("worker crashed")
+
+    scheduler.wait_for_slot = broken_slot
+
+    async def deliver():
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            return await asyncio.wait_for(scheduler.deliver([(0, 'a', 'hi')], executor), timeout=5)
+
+    with pytest.raises(RuntimeError, match="worker crashed"):
+        asyncio.run(deliver())
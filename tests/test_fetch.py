@@ -0,0 +1,106 @@
+"""Fetch policy tests: hedged requests, retries and the time budget"""
+
+import os
+import sys
+import threading
+import time
+from datetime import timedelta
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import daily_quote_bot  # noqa: E402
+from benchmarks.bench_parse import FakeResponse  # noqa: E402
+
+
+class ScriptedSession:
+    """Session whose n-th GET sleeps and then answers as scripted
+
+    Each step is (delay, outcome): outcome is a status code or an exception
+    to raise. The last step repeats once the script runs out. A delay never
+    runs past the request timeout, which then raises Timeout like requests.
+    """
+
+    def __init__(self, *steps):
+        self.steps = steps
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def get(self, url, timeout=None, **kwargs):
+        with self.lock:
+            delay, outcome = self.steps[min(self.calls, len(self.steps) - 1)]
+            self.calls += 1
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise requests.exceptions.Timeout(f"Read timed out after {timeout}s")
+        if delay:
+            time.sleep(delay)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return FakeResponse(body=b'page', status_code=outcome)
+
+
+def make_policy(**kwargs):
+    settings = {'budget': 5.0, 'hedge_after': 0, 'backoff_base': 0.01, 'min_attempt_time': 0.05,
+                'metrics': daily_quote_bot.RunMetrics()}
+    settings.update(kwargs)
+    return daily_quote_bot.FetchPolicy(**settings)
+
+
+def test_slow_first_request_is_hedged():
+    policy = make_policy(hedge_after=0.05)
+    session = ScriptedSession((1.0, 200), (0.0, 200))
+
+    start = time.monotonic()
+    response = policy.get(session, 'https://example.com/')
+    assert response.status_code == 200
+    assert time.monotonic() - start < 0.5
+    assert session.calls == 2
+    assert policy.metrics.counters['hedged_requests'] == 1
+
+
+def test_errors_use_every_attempt_without_a_trailing_backoff(monkeypatch):
+    policy = make_policy()
+    session = ScriptedSession((0.0, requests.exceptions.ConnectionError("refused")))
+    sleeps = []
+    monkeypatch.setattr(daily_quote_bot.time, 'sleep', sleeps.append)
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        policy.get(session, 'https://example.com/')
+    assert session.calls == 3
+    assert len(sleeps) == 2
+    assert policy.metrics.counters['fetch_retries'] == 2
+
+
+def test_http_errors_are_retried():
+    policy = make_policy()
+    session = ScriptedSession((0.0, 503), (0.0, 200))
+
+    assert policy.get(session, 'https://example.com/').status_code == 200
+    assert session.calls == 2
+
+
+def test_slow_requests_stop_at_the_budget():
+    policy = make_policy(budget=0.3, request_timeout=10)
+    session = ScriptedSession((5.0, 200))
+
+    start = time.monotonic()
+    with pytest.raises(requests.exceptions.Timeout):
+        policy.get(session, 'https://example.com/')
+    assert time.monotonic() - start < 0.6
+
+
+@pytest.mark.parametrize('stream, downloads', [(False, 1), (True, 0)])
+def test_download_is_only_timed_here_for_buffered_requests(stream, downloads):
+    class HeadersFirstSession(ScriptedSession):
+        def get(self, url, **kwargs):
+            response = super().get(url, **kwargs)
+            response.elapsed = timedelta(0)
+            return response
+
+    policy = make_policy()
+    policy.get(HeadersFirstSession((0.01, 200)), 'https://example.com/', stream=stream)
+    assert policy.metrics.observations['ttfb'] == 1
+    assert policy.metrics.observations.get('download', 0) == downloads
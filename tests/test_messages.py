@@ -0,0 +1,78 @@
+"""Message tests: rendering, Telegram's limit, markup safety and UTF-16 lengths"""
+
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import daily_quote_bot  # noqa: E402
+from daily_quote_bot import TELEGRAM_MESSAGE_LIMIT, split_message, telegram_length  # noqa: E402
+
+WORDS = "Merely meeting expectations is not enough when you can add some spice to it."
+
+
+def long_text(paragraphs=12, sentences=20):
+    return '\n\n'.join(' '.join([WORDS] * sentences) for _ in range(paragraphs))
+
+
+def test_parts_stay_within_the_limit_and_keep_every_word():
+    text = long_text()
+    parts = split_message(text)
+    assert len(parts) > 1
+    assert all(telegram_length(part) <= TELEGRAM_MESSAGE_LIMIT for part in parts)
+    assert ' '.join(parts).split() == text.split()
+
+
+def test_short_text_is_one_part():
+    assert split_message(WORDS, 'HTML') == (WORDS,)
+
+
+def test_oversized_bold_block_is_closed_and_reopened():
+    text = f"<b>{' '.join([WORDS] * 10)}</b>"
+    parts = split_message(text, 'HTML', 300)
+    assert len(parts) > 1
+    for part in parts:
+        assert telegram_length(part) <= 300
+        assert part.startswith('<b>') and part.endswith('</b>')
+        assert daily_quote_bot.open_html_tags(part) == []
+    assert ' '.join(re.sub(r'</?b>', '', part) for part in parts).split() == text[3:-4].split()
+
+
+def test_html_entities_are_never_cut():
+    text = '&amp;' * 100
+    parts = split_message(text, 'HTML', 100)
+    assert len(parts) > 1
+    assert all(re.fullmatch(r'(?:&amp;)+', part) for part in parts)
+    assert ''.join(parts) == text
+
+
+def test_markdown_v2_escapes_are_never_cut():
+    text = daily_quote_bot.escape_markdown_v2('a.' * 300)
+    parts = split_message(text, 'MarkdownV2', 101)
+    assert len(parts) > 1
+    for part in parts:
+        assert telegram_length(part) <= 101
+        assert (len(part) - len(part.rstrip('\\'))) % 2 == 0
+    assert ''.join(parts) == text
+
+
+def test_non_bmp_characters_count_as_two_units():
+    assert telegram_length('😀') == 2
+    text = '😀' * 3000
+    parts = split_message(text)
+    assert [len(part) for part in parts] == [TELEGRAM_MESSAGE_LIMIT // 2, 3000 - TELEGRAM_MESSAGE_LIMIT // 2]
+    assert ''.join(parts) == text
+
+
+def test_rendering_for_every_chat_is_not_timed_as_hashing():
+    bot = daily_quote_bot.DailyQuoteBot('0:test', ['1'])
+    try:
+        quote = {'date': 'Saturday, October 17, 2026', 'title': 'Spice it up', 'content': WORDS,
+                 'author': 'Ralph Marston'}
+        for message_format in ('html', 'markdownv2', 'plain', 'html'):
+            bot.render_message(quote, message_format)
+        assert 'hash' not in bot.metrics.observations
+        assert bot.metrics.observations['render'] == 3
+    finally:
+        bot.close()
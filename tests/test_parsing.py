@@ -0,0 +1,65 @@
+"""Parsing tests: the raw quote window behind the body fingerprint"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import daily_quote_bot  # noqa: E402
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta name="description" content="Every Monday, a fresh start.">
+<title>The Daily Motivator by Ralph Marston</title>
+</head>
+<body>
+<div class="dm-date">{day}, October 17, 2026</div>
+<h1 class="dm-title">{title}</h1>
+<p>{text}</p>
+<p>— Ralph Marston</p>
+<div id="footer">Copyright</div>
+</body>
+</html>
+"""
+
+
+def make_page(day='Saturday', title='Spice it up', text='Merely meeting expectations is not enough.'):
+    return PAGE.format(day=day, title=title, text=text).encode('utf-8')
+
+
+def test_body_window_skips_the_document_head():
+    page = make_page()
+    start, end = daily_quote_bot.find_body_window(page)
+    assert page[start:].startswith(b'Saturday, October 17, 2026')
+    assert page[start:end].rstrip().endswith(b'Ralph Marston</p>')
+
+
+def test_fingerprint_changes_with_the_quote_despite_day_names_in_the_head():
+    first = daily_quote_bot.body_fingerprint(make_page())
+    assert first == daily_quote_bot.body_fingerprint(make_page().replace(b'Copyright', b'Copyright 2026'))
+    assert first != daily_quote_bot.body_fingerprint(make_page(title='Keep going'))
+    assert first != daily_quote_bot.body_fingerprint(make_page(day='Sunday', text='Another day, another chance.'))
+
+
+def test_window_must_hold_the_parsed_quote():
+    page = make_page()
+    parsed = daily_quote_bot.parse_quote_lines(daily_quote_bot.extract_lines_soup(page))
+    assert daily_quote_bot.body_window_holds_quote(page, parsed)
+
+    # A date and author line ahead of the real quote make a window without it
+    decoy = page.replace(b'<body>\n', b'<body>\n<p>Friday recap by Ralph Marston</p>\n')
+    assert not daily_quote_bot.body_window_holds_quote(decoy, parsed)
+
+
+def test_streamed_read_stops_after_the_quote_window():
+    page = make_page().replace(b'<div id="footer">', b'<script>' + b'x' * 50000 + b'</script>\n<div id="footer">')
+    chunks = [page[offset:offset + 1024] for offset in range(0, len(page), 1024)]
+
+    body, lines, stopped = daily_quote_bot.read_quote_body(iter(chunks))
+    assert stopped and lines is None and len(body) < 2048
+    assert daily_quote_bot.body_fingerprint(body) == daily_quote_bot.body_fingerprint(page)
+
+    body, lines, stopped = daily_quote_bot.read_quote_body(iter(chunks), extract_lines=True)
+    assert stopped and lines == daily_quote_bot.extract_lines_stream(body)
+    assert 'Spice it up' in lines
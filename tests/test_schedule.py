@@ -0,0 +1,109 @@
+"""Scheduling tests: cron expressions and the daemon's adaptive polling"""
+
+import os
+import sys
+import threading
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import daily_quote_bot  # noqa: E402
+from daily_quote_bot import CronSchedule  # noqa: E402
+
+# Saturday
+NOW = datetime(2026, 10, 17, 12, 30)
+
+
+@pytest.mark.parametrize('expression, moment, expected', [
+    ('* * * * *', NOW, datetime(2026, 10, 17, 12, 31)),
+    ('0 7 * * *', NOW, datetime(2026, 10, 18, 7, 0)),
+    ('15,45 * * * *', NOW, datetime(2026, 10, 17, 12, 45)),
+    ('0 9-17 * * *', NOW, datetime(2026, 10, 17, 13, 0)),
+    ('*/20 * * * *', NOW, datetime(2026, 10, 17, 12, 40)),
+    ('10-50/15 * * * *', NOW, datetime(2026, 10, 17, 12, 40)),
+    ('5/25 * * * *', NOW, datetime(2026, 10, 17, 12, 55)),
+    ('0 0 1 */3 *', NOW, datetime(2027, 1, 1, 0, 0)),
+    ('30 23 31 12 *', NOW, datetime(2026, 12, 31, 23, 30)),
+    ('0 0 29 2 *', NOW, datetime(2028, 2, 29, 0, 0)),
+    ('0 0 31 * *', datetime(2027, 1, 31, 0, 0), datetime(2027, 3, 31, 0, 0)),
+    ('0 9 * * 5', NOW, datetime(2026, 10, 23, 9, 0)),
+    ('0 9 13 * *', NOW, datetime(2026, 11, 13, 9, 0)),
+    ('0 9 13 * 5', NOW, datetime(2026, 10, 23, 9, 0)),
+    ('0 9 19 * 5', NOW, datetime(2026, 10, 19, 9, 0)),
+    ('0 9 * * 0', NOW, datetime(2026, 10, 18, 9, 0)),
+    ('0 9 * * 7', NOW, datetime(2026, 10, 18, 9, 0)),
+    ('0 9 * * 1-5', NOW, datetime(2026, 10, 19, 9, 0)),
+    ('0 9 * * 6-7', NOW, datetime(2026, 10, 18, 9, 0)),
+])
+def test_next_after(expression, moment, expected):
+    assert CronSchedule(expression).next_after(moment) == expected
+
+
+@pytest.mark.parametrize('expression', [
+    '* * * *',
+    '* * * * * *',
+    '60 * * * *',
+    '* 24 * * *',
+    '* * 0 * *',
+    '* * 32 * *',
+    '* * * 0 *',
+    '* * * 13 *',
+    '* * * * 8',
+    '30-10 * * * *',
+    '*/0 * * * *',
+    'x * * * *',
+])
+def test_invalid_expressions_are_rejected(expression):
+    with pytest.raises(ValueError):
+        CronSchedule(expression)
+
+
+def test_impossible_date_never_matches():
+    with pytest.raises(ValueError, match="never matches"):
+        CronSchedule('0 0 30 2 *').next_after(NOW)
+
+
+class ScriptedStop:
+    """Stop event that records every wait and stops after the last one"""
+
+    def __init__(self, waits):
+        self.waits = []
+        self.remaining = waits
+
+    def is_set(self):
+        return False
+
+    def wait(self, timeout):
+        self.waits.append(timeout)
+        self.remaining -= 1
+        return self.remaining < 0
+
+
+@pytest.fixture
+def bot(tmp_path):
+    bot = daily_quote_bot.DailyQuoteBot('0:test', ['1'])
+    bot.quote_tracking_file = str(tmp_path / 'last_quote_data.json')
+    yield bot
+    bot.close()
+
+
+def test_polling_doubles_up_to_the_cap_and_resets_after_a_send(bot):
+    results = iter(["No new quote - skipped"] * 4 + ["New quote sent successfully"])
+    bot.run = lambda: next(results)
+    stop = ScriptedStop(waits=5)
+
+    bot.run_forever([CronSchedule('0 0 1 1 *')], poll_min=10, poll_max=40, stop_event=stop)
+
+    # First and last waits run to the yearly cron tick
+    assert stop.waits[0] > 3600 and stop.waits[-1] > 3600
+    assert stop.waits[1:-1] == pytest.approx([10, 20, 40, 40], abs=1)
+
+
+def test_already_set_stop_event_never_runs(bot):
+    bot.run = lambda: pytest.fail("run() called after stop")
+    stop_event = threading.Event()
+    stop_event.set()
+
+    bot.run_forever([CronSchedule('* * * * *')], stop_event=stop_event)
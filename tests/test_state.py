@@ -0,0 +1,79 @@
+"""State file tests: the binary format and switching between state formats"""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import daily_quote_bot  # noqa: E402
+from daily_quote_bot import (STATE_HEADER, STATE_MAGIC, STATE_RECORD, decode_binary_state,  # noqa: E402
+                             encode_state)
+
+STATE = {
+    'hash': 'abc123',
+    'date': 'Saturday, October 17, 2026',
+    'title': 'Spice it up',
+    'content_preview': 'Merely meeting expectations… ✨',
+    'sent_at': '2026-10-17T07:00:00',
+    'fallback': False,
+    'delivered_chats': 3
+}
+
+
+def test_binary_round_trip_keeps_non_string_fields():
+    assert decode_binary_state(encode_state(STATE, 'binary')) == STATE
+
+
+def test_unknown_field_ids_are_skipped():
+    unknown = STATE_RECORD.pack(200, 3) + b'new'
+    assert decode_binary_state(encode_state(STATE, 'binary') + unknown) == STATE
+
+
+@pytest.mark.parametrize('buffer, message', [
+    (STATE_MAGIC, "Truncated state header"),
+    (b'', "Truncated state header"),
+    (STATE_HEADER.pack(b'JSON', 1), "Not a binary state file"),
+    (STATE_HEADER.pack(STATE_MAGIC, 99), "Unsupported state format version"),
+    (encode_state(STATE, 'binary')[:-2], "Truncated state record"),
+    (STATE_HEADER.pack(STATE_MAGIC, 1) + b'\x01\x05', "Truncated state record"),
+])
+def test_invalid_binary_state_raises(buffer, message):
+    with pytest.raises(ValueError, match=message):
+        decode_binary_state(buffer)
+
+
+def test_binary_bot_falls_back_to_the_json_state(tmp_path):
+    with open(tmp_path / 'state.json', 'w', encoding='utf-8') as f:
+        json.dump(STATE, f)
+    bot = daily_quote_bot.DailyQuoteBot('0:test', ['1'], state_format='binary',
+                                        state_path=str(tmp_path / 'state.bin'))
+    try:
+        assert bot.load_last_quote_data() == STATE
+
+        bot.write_state(dict(STATE, title='Keep going'))
+        assert daily_quote_bot.read_state_file(str(tmp_path / 'state.bin'))['title'] == 'Keep going'
+        assert bot.load_last_quote_data()['title'] == 'Keep going'
+    finally:
+        bot.close()
+
+
+def test_binary_state_is_refused_for_a_json_path(tmp_path):
+    with pytest.raises(ValueError, match=r"\.json"):
+        daily_quote_bot.DailyQuoteBot('0:test', ['1'], state_format='binary',
+                                      state_path=str(tmp_path / 'state.json'))
+
+
+def test_state_is_read_without_a_lock_when_the_lock_file_cannot_be_opened(tmp_path):
+    path = tmp_path / 'state.json'
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(STATE, f)
+    # A directory in the lock file's place fails to open, like a read-only state directory
+    os.mkdir(tmp_path / 'state.json.lock')
+    bot = daily_quote_bot.DailyQuoteBot('0:test', ['1'], state_path=str(path))
+    try:
+        assert bot.load_last_quote_data() == STATE
+    finally:
+        bot.close()